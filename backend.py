@@ -1,17 +1,34 @@
-from supabase import create_client
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# The supabase SDK is slow to import, so the client is only created on first use
+_supabase = None
 
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+def get_supabase():
+    """Returns the shared Supabase client, importing the SDK and connecting on first call."""
+    global _supabase
+    if _supabase is None:
+        from supabase import create_client
+        from dotenv import load_dotenv
+
+        load_dotenv()
+
+        SUPABASE_URL = os.getenv("SUPABASE_URL")
+        SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+        _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _supabase
+
+
+def __getattr__(name):
+    # Keeps `backend.supabase` working without creating the client at import time
+    if name == "supabase":
+        return get_supabase()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def save_chat(username, question, answer):
-    response = supabase.table("chat_history").insert({
+    response = get_supabase().table("chat_history").insert({
         "username": username,
         "question": question,
         "answer": answer
@@ -0,0 +1,88 @@
+"""
+Compares decode time and peak memory of the JSON backends in decoding.py.
+
+Usage:
+    python benchmarks/bench_decode.py [payload.json ...] [--repeat N]
+
+Pass response bodies recorded from cricapi (e.g. saved match_info / currentMatches
+responses). Without arguments a synthetic, scorecard-heavy match_info payload is used.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import decoding  # noqa: E402
+
+
+def synthetic_match_info(innings=4, batters=11, bowlers=8):
+    """Builds a match_info-shaped payload with a large scorecard."""
+    def batting(i):
+        return {"batsman": {"id": f"b{i}", "name": f"Batter {i}"}, "dismissal-text": "c Fielder b Bowler",
+                "r": 42, "b": 37, "4s": 5, "6s": 1, "sr": 113.51}
+
+    def bowling(i):
+        return {"bowler": {"id": f"w{i}", "name": f"Bowler {i}"}, "o": 4, "m": 0, "r": 31, "w": 2, "nb": 0, "wd": 1, "eco": 7.75}
+
+    scorecard = [
+        {"inning": f"Team {n % 2} Inning {n // 2 + 1}",
+         "batting": [batting(i) for i in range(batters)],
+         "bowling": [bowling(i) for i in range(bowlers)],
+         "catching": [{"catcher": {"id": f"c{i}", "name": f"Fielder {i}"}, "catch": 1} for i in range(5)]}
+        for n in range(innings)
+    ]
+    return {
+        "apikey": "x", "status": "success",
+        "data": {"id": "synthetic", "name": "Team 0 vs Team 1", "matchType": "test", "status": "Match drawn",
+                 "teams": ["Team 0", "Team 1"], "matchStarted": True, "matchEnded": True, "scorecard": scorecard},
+        "info": {"hitsToday": 1, "hitsLimit": 100, "queryTime": 12.3},
+    }
+
+
+def measure(fn, content, repeat):
+    """
+    Returns (best seconds per decode, peak traced bytes during one decode,
+    bytes still held by the decoded result).
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(content)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    result = fn(content)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('payloads', nargs='*', help='recorded cricapi response bodies')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    if args.payloads:
+        inputs = [(path, open(path, 'rb').read()) for path in args.payloads]
+    else:
+        inputs = [('synthetic match_info', json.dumps(synthetic_match_info(innings=40)).encode('utf-8'))]
+
+    candidates = [(name, lambda c, name=name: decoding.decode(c, name)) for name in decoding.BACKENDS]
+    if decoding.ijson is not None:
+        candidates.append(('ijson (stream, skip scorecard)', decoding.stream_decode))
+
+    for label, content in inputs:
+        print(f"\n{label}: {len(content) / 1024:.1f} KiB")
+        print(f"  {'backend':<32}{'best ms':>10}{'peak KiB':>12}{'retained KiB':>14}")
+        for name, fn in candidates:
+            seconds, peak, retained = measure(fn, content, args.repeat)
+            print(f"  {name:<32}{seconds * 1000:>10.3f}{peak / 1024:>12.1f}{retained / 1024:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
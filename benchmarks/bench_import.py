@@ -0,0 +1,89 @@
+"""
+Import-time benchmark for cold start, based on `python -X importtime`.
+
+Usage:
+    python benchmarks/bench_import.py [--module main --module backend] [--budget-ms 2500] [--top 15]
+
+Each module is imported in a fresh interpreter. The script prints the total import
+time and the slowest imports. It exits non-zero if a module goes over the budget or
+pulls in one of the heavy SDKs that should only load on first use, so
+time-to-first-render regressions are caught. main.py runs in Streamlit's "bare" mode
+(no server) with the background poller disabled.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SDKs that must not be imported at startup
+DEFAULT_LAZY = ['google.generativeai', 'supabase', 'requests', 'httpx']
+# config.py imports python-dotenv only when there is a .env file to load
+if not os.path.exists(os.path.join(ROOT, '.env')):
+    DEFAULT_LAZY.append('dotenv')
+
+LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def import_profile(module, repeat):
+    """Returns (cumulative_us of module, {package: self_us}) from the fastest of repeat runs."""
+    best = None
+    for _ in range(repeat):
+        env = dict(os.environ, POLL_INTERVAL='0', PYTHONDONTWRITEBYTECODE='1')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+        self_times = {}
+        total = 0
+        for line in result.stderr.splitlines():
+            found = LINE.match(line)
+            if not found:
+                continue
+            self_us, cumulative_us, indent, package = found.groups()
+            if len(indent) <= 1 and package != module:
+                # Output is post-order: a top-level line closes an unrelated subtree
+                # (interpreter start-up), so only the module's own imports are kept
+                self_times = {}
+                continue
+            self_times[package] = self_times.get(package, 0) + int(self_us)
+            if package == module:
+                total = int(cumulative_us)
+                break
+        if best is None or total < best[0]:
+            best = (total, self_times)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', action='append', help='module to import (default: main and backend)')
+    parser.add_argument('--budget-ms', type=float, default=None, help='fail if a module takes longer than this')
+    parser.add_argument('--lazy', action='append', help='packages that must not be imported at startup')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest imports to list')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per module (fastest is reported)')
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.module or ['main', 'backend']:
+        total_us, self_times = import_profile(module, args.repeat)
+        print(f"\nimport {module}: {total_us / 1000:.1f} ms")
+        for package, self_us in sorted(self_times.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"  {self_us / 1000:>8.1f} ms  {package}")
+
+        eager = sorted(p for p in args.lazy or DEFAULT_LAZY if p in self_times)
+        if eager:
+            print(f"  FAIL: imported at startup: {', '.join(eager)}")
+            failed = True
+        if args.budget_ms is not None and total_us / 1000 > args.budget_ms:
+            print(f"  FAIL: over budget of {args.budget_ms:.0f} ms")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
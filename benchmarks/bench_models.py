@@ -0,0 +1,110 @@
+"""
+Compares the memory footprint of raw cricapi dicts with the slotted models in models.py.
+
+Usage:
+    python benchmarks/bench_models.py [--squads N] [--players N] [--matches N]
+    python benchmarks/bench_models.py --squad-file squad.json --matches-file current.json
+
+Recorded match_squad / currentMatches response bodies can be passed instead of the
+synthetic data; they are replicated to reach the requested counts.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models  # noqa: E402
+
+ROLES = ['Batsman', 'Bowler', 'Batting Allrounder', 'Bowling Allrounder', 'WK-Batsman']
+COUNTRIES = ['India', 'Australia', 'England', 'South Africa', 'New Zealand', 'Pakistan']
+
+
+def synthetic_squad(match_no, players_per_team):
+    return [
+        {"teamName": f"Team {match_no}-{side}", "shortname": f"T{side}", "img": "https://h.cricapi.com/img/icon512.png",
+         "players": [
+             {"id": f"{match_no}-{side}-{i}", "name": f"Player {match_no}-{side}-{i}",
+              "role": ROLES[i % len(ROLES)], "battingStyle": "Right Handed Bat",
+              "bowlingStyle": "Right-arm medium", "country": COUNTRIES[(match_no + side) % len(COUNTRIES)],
+              "playerImg": "https://h.cricapi.com/img/icon512.png"}
+             for i in range(players_per_team)
+         ]}
+        for side in (0, 1)
+    ]
+
+
+def synthetic_match(match_no):
+    return {"id": f"match-{match_no}", "name": f"Team {match_no}-0 vs Team {match_no}-1, 1st T20I",
+            "matchType": "t20", "status": "Match not started", "venue": "Some Stadium, Some City",
+            "date": "2026-10-16", "dateTimeGMT": "2026-10-16T14:00:00",
+            "teams": [f"Team {match_no}-0", f"Team {match_no}-1"],
+            "teamInfo": [{"name": f"Team {match_no}-{s}", "shortname": f"T{s}", "img": ""} for s in (0, 1)],
+            "fantasyEnabled": True, "bbbEnabled": False, "hasSquad": True,
+            "matchStarted": False, "matchEnded": False}
+
+
+def load_json_body(path):
+    with open(path, 'rb') as f:
+        body = json.load(f)
+    return body.get('data', body)
+
+
+def traced(build):
+    """Returns (result, bytes allocated while building it, seconds taken)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--squads', type=int, default=200, help='number of cached match squads')
+    parser.add_argument('--players', type=int, default=18, help='players per team (synthetic data)')
+    parser.add_argument('--matches', type=int, default=100, help='number of current matches')
+    parser.add_argument('--squad-file', help='recorded match_squad response body')
+    parser.add_argument('--matches-file', help='recorded currentMatches response body')
+    args = parser.parse_args()
+
+    if args.squad_file:
+        recorded = load_json_body(args.squad_file)
+        make_squad = lambda n: recorded  # noqa: E731
+    else:
+        make_squad = lambda n: synthetic_squad(n, args.players)  # noqa: E731
+    if args.matches_file:
+        recorded_matches = load_json_body(args.matches_file)
+        make_matches = lambda: [recorded_matches[i % len(recorded_matches)] for i in range(args.matches)]  # noqa: E731
+    else:
+        make_matches = lambda: [synthetic_match(i) for i in range(args.matches)]  # noqa: E731
+
+    # Both forms are built from the same JSON bytes, so neither shares strings with the other
+    squad_bodies = [json.dumps(make_squad(n)).encode('utf-8') for n in range(args.squads)]
+    matches_body = json.dumps(make_matches()).encode('utf-8')
+    raw_squads, raw_squad_bytes, _ = traced(lambda: [json.loads(body) for body in squad_bodies])
+    raw_matches, raw_match_bytes, _ = traced(lambda: json.loads(matches_body))
+    # Models parsed straight from the decoded dicts, which are then dropped
+    model_squads, model_squad_bytes, squad_seconds = traced(
+        lambda: [models.parse_squad(json.loads(body)) for body in squad_bodies])
+    model_matches, model_match_bytes, match_seconds = traced(lambda: models.parse_matches(json.loads(matches_body)))
+
+    players = sum(len(team.players) for squad in model_squads for team in squad)
+    print(f"{args.squads} squads / {players} players, {args.matches} matches\n")
+    print(f"{'':<10}{'dict KiB':>12}{'model KiB':>12}{'saving':>10}{'decode+parse ms':>17}")
+    for label, raw, compact, seconds in (
+        ('squads', raw_squad_bytes, model_squad_bytes, squad_seconds),
+        ('matches', raw_match_bytes, model_match_bytes, match_seconds),
+    ):
+        print(f"{label:<10}{raw / 1024:>12.1f}{compact / 1024:>12.1f}{1 - compact / raw:>10.0%}{seconds * 1000:>17.2f}")
+    print(f"\nper player: dict {models.deep_sizeof(raw_squads[0][0]['players'][0])} B, "
+          f"model {models.deep_sizeof(model_squads[0][0].players[0])} B (deep_sizeof, shared strings included)")
+
+
+if __name__ == '__main__':
+    main()
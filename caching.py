@@ -0,0 +1,230 @@
+"""
+Caches for cricket API responses: a thread-safe in-memory LRU with per-entry TTLs,
+an optional SQLite second level that survives restarts, and a single-flight helper
+that collapses concurrent identical requests into one.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from config import (
+    CACHE_DB_KEEP_STALE, CACHE_MAX_BYTES, CACHE_MAX_ENTRIES, CACHE_TTL_CURRENT_MATCHES,
+    CACHE_TTL_MATCH_INFO_IDLE, CACHE_TTL_MATCH_INFO_LIVE, CACHE_TTL_MATCH_SQUAD,
+)
+
+
+def is_live_match(match):
+    """True if the match (a match_info or currentMatches entry) has started but not ended."""
+    return bool(match.get('matchStarted')) and not match.get('matchEnded')
+
+
+def get_cache_ttl(url_type, data):
+    """Returns how long (seconds) a successful response for this endpoint stays fresh."""
+    if url_type == 'currentMatches':
+        return CACHE_TTL_CURRENT_MATCHES
+    if url_type == 'match_squad':
+        return CACHE_TTL_MATCH_SQUAD
+    if url_type == 'match_info' and isinstance(data, dict):
+        if is_live_match(data):
+            return CACHE_TTL_MATCH_INFO_LIVE
+        if data.get('matchEnded'):
+            # Finished matches no longer change
+            return CACHE_TTL_MATCH_SQUAD
+    return CACHE_TTL_MATCH_INFO_IDLE
+
+
+class DiskResponseCache:
+    """
+    SQLite-backed response store with TTL metadata next to each payload. Runs in WAL
+    mode so several worker processes on one host can read and write it concurrently.
+    Any SQLite error is treated as a cache miss: the disk cache is only an optimisation.
+    """
+    def __init__(self, path, keep_stale=CACHE_DB_KEEP_STALE):
+        self.path = path
+        self.keep_stale = keep_stale
+        self._local = threading.local()  # sqlite3 connections are per thread
+        self._writes = 0
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+                    "stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+                )
+        except sqlite3.Error:
+            pass
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, allow_stale=False):
+        """Returns (data, remaining_ttl, size) for key, or None if missing (or expired unless allow_stale)."""
+        try:
+            row = self._connect().execute(
+                "SELECT payload, expires_at FROM responses WHERE key = ?", (json.dumps(key),)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        payload, expires_at = row
+        remaining = expires_at - time.time()
+        if remaining <= 0 and not allow_stale:
+            return None
+        return json.loads(payload), remaining, len(payload)
+
+    def set(self, key, data, ttl):
+        """Stores data with its expiry time; occasionally prunes rows too old to serve even as stale."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, payload, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (json.dumps(key), json.dumps(data), now, now + ttl),
+                )
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    conn.execute("DELETE FROM responses WHERE expires_at < ?", (now - self.keep_stale,))
+        except sqlite3.Error:
+            pass
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of cricket API responses keyed by (endpoint, id).
+    Entries expire after a per-entry TTL; the least recently used entries are evicted
+    once either the entry count or the approximate payload size exceeds its cap.
+    An optional DiskResponseCache acts as a second level behind the in-memory one.
+    """
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, disk=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self._entries = OrderedDict()  # key -> (data, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Returns the cached data for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        if self.disk is not None:
+            found = self.disk.get(key)
+            if found is not None:
+                data, remaining, size = found
+                self._store(key, data, remaining, size)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return data
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get_stale(self, key):
+        """Returns cached data for key even if expired (None if never cached or evicted)."""
+        entry = self.get_stale_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_stale_entry(self, key):
+        """Like get_stale, but returns (data, size), or None if never cached or evicted."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0], entry[2]
+        if self.disk is not None:
+            found = self.disk.get(key, allow_stale=True)
+            if found is not None:
+                return found[0], found[2]
+        return None
+
+    def set(self, key, data, ttl, size, persist=True):
+        """
+        Stores data for ttl seconds; size is the payload size in bytes used for the memory cap.
+        persist=False keeps the entry in memory only (for values that are not JSON, e.g. models).
+        """
+        if ttl <= 0:
+            return
+        self._store(key, data, ttl, size)
+        if persist and self.disk is not None:
+            self.disk.set(key, data, ttl)
+
+    def _store(self, key, data, ttl, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (data, time.monotonic() + ttl, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self.evictions += 1
+
+    def stats(self):
+        """Returns hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one: the first caller runs the
+    function, everyone arriving while it is in flight waits and gets the same result.
+    """
+    def __init__(self):
+        self._calls = {}  # key -> Future of the in-flight call
+        self._lock = threading.Lock()
+        self.shared = 0  # number of callers served by someone else's request
+
+    def do(self, key, fn):
+        """Runs fn() once for all concurrent callers of key and returns its result."""
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.shared += 1
+        if not is_leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
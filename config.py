@@ -0,0 +1,96 @@
+"""
+Settings for the app, read from the environment (and a .env file if there is one).
+
+Every module imports its settings from here, so the .env file is loaded before any of
+them is read. Values are plain module constants; each has a default that works without
+any configuration.
+"""
+import os
+
+# Load environment variables from .env file (python-dotenv is only imported if there is one)
+for dotenv_path in ('.env', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')):
+    if os.path.exists(dotenv_path):
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path)
+        break
+
+# Retrieve API keys and system prompt
+CRICKET_API_KEY = os.getenv('CRICKET_API_KEY')
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+SYSTEM_PROMPT = os.getenv('SYSTEM_PROMPT')
+
+# Connection pool and timeout settings for the cricket API (seconds for timeouts)
+CRICKET_API_POOL_SIZE = int(os.getenv('CRICKET_API_POOL_SIZE', '10'))
+CRICKET_API_CONNECT_TIMEOUT = float(os.getenv('CRICKET_API_CONNECT_TIMEOUT', '3.05'))
+CRICKET_API_READ_TIMEOUT = float(os.getenv('CRICKET_API_READ_TIMEOUT', '10'))
+
+# Retry / circuit breaker settings for the cricket API
+CRICKET_API_MAX_RETRIES = int(os.getenv('CRICKET_API_MAX_RETRIES', '2'))
+CRICKET_API_BACKOFF_BASE = float(os.getenv('CRICKET_API_BACKOFF_BASE', '0.5'))
+CRICKET_API_BACKOFF_MAX = float(os.getenv('CRICKET_API_BACKOFF_MAX', '4'))
+# Hard cap (seconds) on the time spent on one request including retries
+CRICKET_API_DEADLINE = float(os.getenv('CRICKET_API_DEADLINE', '20'))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+
+# Daily quota budgeting: share of the hitsLimit after which low / normal priority calls stop
+BUDGET_LOW_PRIORITY_CUTOFF = float(os.getenv('BUDGET_LOW_PRIORITY_CUTOFF', '0.7'))
+BUDGET_NORMAL_PRIORITY_CUTOFF = float(os.getenv('BUDGET_NORMAL_PRIORITY_CUTOFF', '0.9'))
+
+# Minimum confidence for the local match resolver to skip the LLM intent call
+LOCAL_RESOLVER_THRESHOLD = float(os.getenv('LOCAL_RESOLVER_THRESHOLD', '0.75'))
+# Likely matches whose details are prefetched while the LLM resolves the intent (0 disables)
+PREFETCH_CANDIDATES = int(os.getenv('PREFETCH_CANDIDATES', '2'))
+
+# Intent cache: max remembered (query, match list) pairs
+INTENT_CACHE_SIZE = int(os.getenv('INTENT_CACHE_SIZE', '2048'))
+
+# Streaming renderer: minimum seconds between re-renders of a streamed reply,
+# and buffered characters that force an earlier one (0 = time only)
+STREAM_FLUSH_INTERVAL = float(os.getenv('STREAM_FLUSH_INTERVAL', '0.05'))
+STREAM_FLUSH_CHARS = int(os.getenv('STREAM_FLUSH_CHARS', '0'))
+
+# Chat history: approximate token budget per chat (0 = unlimited) and max characters
+# of the running summary that replaces dropped turns
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv('CHAT_HISTORY_TOKEN_BUDGET', '8000'))
+CHAT_HISTORY_SUMMARY_CHARS = int(os.getenv('CHAT_HISTORY_SUMMARY_CHARS', '1500'))
+
+# Answer cache: max remembered answers (0 disables), seconds each stays valid, and the
+# minimum query similarity (Jaccard over content words) for a near-identical question to hit
+ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '512'))
+ANSWER_CACHE_TTL = float(os.getenv('ANSWER_CACHE_TTL', '300'))
+ANSWER_CACHE_SIMILARITY = float(os.getenv('ANSWER_CACHE_SIMILARITY', '0.8'))
+
+# Match resolution mode: 'two_call' asks intent_model first, then the chat; 'single_call'
+# lets the chat model request match details through a function call in the same turn
+LLM_INTENT_MODE = os.getenv('LLM_INTENT_MODE', 'two_call')
+# Max function calls answered within one turn in single_call mode
+LLM_MAX_TOOL_CALLS = int(os.getenv('LLM_MAX_TOOL_CALLS', '2'))
+
+# Background poller: base interval (0 disables), idle threshold and max backed-off interval.
+# Each pass costs up to CRICKET_API_MAX_PAGES currentMatches pages plus one hit per live
+# match, i.e. roughly 100-700 hits a day at every 15 minutes. All its calls are low
+# priority, so they stop once BUDGET_LOW_PRIORITY_CUTOFF of the daily quota is used.
+POLL_INTERVAL = float(os.getenv('POLL_INTERVAL', '900'))
+POLL_IDLE_AFTER = float(os.getenv('POLL_IDLE_AFTER', '1800'))
+POLL_MAX_INTERVAL = float(os.getenv('POLL_MAX_INTERVAL', '7200'))
+
+# currentMatches pagination: max pages per refresh (0 = all) and pages fetched in parallel
+CRICKET_API_MAX_PAGES = int(os.getenv('CRICKET_API_MAX_PAGES', '4'))
+CRICKET_API_PAGE_CONCURRENCY = int(os.getenv('CRICKET_API_PAGE_CONCURRENCY', '3'))
+
+# Response cache settings: per-endpoint freshness (seconds) and size limits
+CACHE_TTL_CURRENT_MATCHES = float(os.getenv('CACHE_TTL_CURRENT_MATCHES', '60'))
+CACHE_TTL_MATCH_SQUAD = float(os.getenv('CACHE_TTL_MATCH_SQUAD', '21600'))
+CACHE_TTL_MATCH_INFO_LIVE = float(os.getenv('CACHE_TTL_MATCH_INFO_LIVE', '30'))
+CACHE_TTL_MATCH_INFO_IDLE = float(os.getenv('CACHE_TTL_MATCH_INFO_IDLE', '900'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '512'))
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+# JSON decoder for API responses ('orjson', 'ujson' or 'json'); unset = fastest installed
+JSON_BACKEND = os.getenv('JSON_BACKEND')
+# Endpoints decoded with the streaming parser, which drops unused subtrees (e.g. "match_info")
+CRICKET_API_STREAM_ENDPOINTS = [e.strip() for e in os.getenv('CRICKET_API_STREAM_ENDPOINTS', '').split(',') if e.strip()]
+# Optional on-disk cache (SQLite file path) that survives restarts and is shared by worker processes
+CACHE_DB_PATH = os.getenv('CACHE_DB_PATH')
+# How long (seconds) expired rows are kept on disk as a stale fallback
+CACHE_DB_KEEP_STALE = float(os.getenv('CACHE_DB_KEEP_STALE', '86400'))
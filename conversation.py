@@ -0,0 +1,486 @@
+"""
+Chat-side helpers: caches for LLM match intents and answers, the throttled renderer
+and function-call loop for streamed replies, and the bookkeeping that keeps each
+chat's prompt small (what match context a chat has already seen, and the token
+budget of its history).
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from config import (
+    ANSWER_CACHE_SIMILARITY, ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, CHAT_HISTORY_SUMMARY_CHARS,
+    CHAT_HISTORY_TOKEN_BUDGET, INTENT_CACHE_SIZE, LLM_MAX_TOOL_CALLS, STREAM_FLUSH_CHARS,
+    STREAM_FLUSH_INTERVAL,
+)
+from match_store import diff_matches, is_empty_diff
+from matching import normalise
+
+
+class IntentCache:
+    """
+    Thread-safe LRU of LLM match intents keyed by (normalised query, match-list hash),
+    shared by all sessions. A new match list changes the hash, so old entries simply
+    stop being hit and age out.
+    """
+    def __init__(self, max_entries=INTENT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.local = 0  # turns resolved without the intent LLM (see record_local)
+
+    @staticmethod
+    def make_key(user_query, current_matches_summary):
+        return normalise(user_query), hashlib.sha1(current_matches_summary.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Returns a copy of the cached intent, or None."""
+        with self._lock:
+            intent = self._entries.get(key)
+            if intent is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(intent)
+
+    def set(self, key, intent):
+        with self._lock:
+            self._entries[key] = dict(intent)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_local(self):
+        """Counts a turn the local resolver answered, so the cache was not needed."""
+        with self._lock:
+            self.local += 1
+
+    def stats(self):
+        """Returns hit/miss counters, local resolutions and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "local": self.local,
+                "entries": len(self._entries),
+            }
+
+
+class StreamRenderer:
+    """
+    Renders a streamed reply into a Streamlit placeholder without re-rendering on
+    every chunk: chunks are collected in a list and the placeholder is only updated
+    once flush_interval seconds have passed (or flush_chars are pending).
+    """
+    def __init__(self, placeholder, flush_interval=STREAM_FLUSH_INTERVAL,
+                 flush_chars=STREAM_FLUSH_CHARS, cursor="▌"):
+        self.placeholder = placeholder
+        self.flush_interval = flush_interval
+        self.flush_chars = flush_chars
+        self.cursor = cursor
+        self._parts = []
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    @property
+    def text(self):
+        """Everything received so far."""
+        if len(self._parts) > 1:
+            self._parts = [''.join(self._parts)]
+        return self._parts[0] if self._parts else ''
+
+    def append(self, chunk):
+        """Adds a chunk and re-renders if the interval has elapsed."""
+        self._parts.append(chunk)
+        self._pending += len(chunk)
+        now = time.monotonic()
+        if (now - self._last_flush >= self.flush_interval
+                or (self.flush_chars and self._pending >= self.flush_chars)):
+            self.flush(now)
+
+    def flush(self, now=None):
+        """Renders the text so far with the typing cursor."""
+        self.placeholder.markdown(self.text + self.cursor)
+        self._pending = 0
+        self._last_flush = now or time.monotonic()
+
+    def finish(self):
+        """Renders the final text without the cursor and returns it."""
+        text = self.text
+        self.placeholder.markdown(text)
+        return text
+
+
+# Answer to function calls past LLM_MAX_TOOL_CALLS in one turn
+TOOL_LIMIT_RESULT = "Tool limit reached for this message. Answer from the context you already have."
+
+
+def split_chunk(chunk):
+    """Returns (text, function_call) of a streamed chunk; chunk.text raises on function calls."""
+    text, function_call = "", None
+    for candidate in chunk.candidates[:1]:
+        for part in candidate.content.parts:
+            if "function_call" in part:
+                function_call = function_call or part.function_call
+            elif part.text:
+                text += part.text
+    return text, function_call
+
+
+def stream_reply(response, on_text, answer_call, send_result, max_tool_calls=LLM_MAX_TOOL_CALLS):
+    """
+    Streams a reply's text into on_text, answering the model's function calls as they come:
+    answer_call(function_call) returns the result and send_result(name, result, allow_tools)
+    returns the model's next response. Every call is answered, or the history would end on
+    an unanswered call; calls past max_tool_calls get TOOL_LIMIT_RESULT, and the last
+    allowed answer is sent with allow_tools=False. Returns the number of calls.
+    """
+    tool_calls = 0
+    while response is not None:
+        function_call = None
+        for chunk in response:
+            text, call = split_chunk(chunk)
+            if text:
+                on_text(text)
+            function_call = function_call or call
+        response = None
+        if function_call:
+            tool_calls += 1
+            result = answer_call(function_call) if tool_calls <= max_tool_calls else TOOL_LIMIT_RESULT
+            response = send_result(function_call.name, result, tool_calls < max_tool_calls)
+    return tool_calls
+
+
+def format_match_line(m):
+    """One line of the general match data sent to the main LLM."""
+    return f"Match: {m.get('name', 'N/A')}, Status: {m.get('status', 'N/A')}, ID: {m.get('id', 'N/A')}"
+
+
+def format_match_details(match_id, match_name, match_bundle):
+    """The detailed info and squads of one match sent to the main LLM ('' if both are missing)."""
+    match_info = match_bundle['info']
+    match_squad = match_bundle['squad']
+
+    match_details = ""
+    if match_info:
+        match_details += f"Detailed Info for Match ID {match_id} ({match_name or 'N/A'}):\n"
+        for key, value in match_info.items():
+            if isinstance(value, (str, int, float, bool)):
+                match_details += f"- {key}: {value}\n"
+        match_details += "\n"
+
+    if match_squad:
+        match_details += "Squads:\n"
+        for team_squad in match_squad:
+            players = [player.name for player in team_squad.players]
+            match_details += f"  - {team_squad.name}: {', '.join(players)}\n"
+        match_details += "\n"
+    return match_details
+
+
+class ChatContextTracker:
+    """
+    Remembers which static context (the current match list, match details) a chat
+    session has already been sent. The match list goes out in full once, later
+    turns only carry what changed, and repeated match details are replaced by a
+    short reference. Changes are staged and only recorded by commit(), once the
+    message actually reached the chat history.
+    """
+    FULL_LIST_HEADER = "General Current Match Data:\n"
+
+    def __init__(self):
+        self.sent_matches = None  # reference to the match list the chat last saw
+        self.sent_details = {}  # match id -> (hash of the details text sent, its longest line)
+        self._staged = {}
+
+    def match_list_context(self, matches):
+        """Returns the match-list context to prepend this turn ('' if the chat is up to date)."""
+        if not matches or matches is self.sent_matches:
+            return ""
+        self._staged['matches'] = matches
+        full_text = self.FULL_LIST_HEADER + "\n".join(format_match_line(m) for m in matches) + "\n\n"
+        if self.sent_matches is None:
+            return full_text
+        diff = diff_matches(self.sent_matches, matches)
+        if is_empty_diff(diff):
+            return ""
+        changed = len(diff['added']) + len(diff['removed']) + len(diff['status_changed'])
+        if changed > len(matches) // 2:
+            # Mostly new data: a fresh full list is clearer than a long delta
+            return full_text
+        lines = ["Updates to the General Current Match Data since my last message:"]
+        lines += [f"Added - {format_match_line(m)}" for m in diff['added']]
+        lines += [f"Removed - {format_match_line(m)}" for m in diff['removed']]
+        lines += [f"Status changed - {format_match_line(m)}" for m in diff['status_changed']]
+        return "\n".join(lines) + "\n\n"
+
+    def details_context(self, match_id, details):
+        """Returns details, or a short reference if the identical text was already sent."""
+        digest = hashlib.sha1(details.encode('utf-8')).hexdigest()
+        sent = self.sent_details.get(match_id)
+        if sent is not None and sent[0] == digest:
+            return f"(Detailed info and squads for match ID {match_id} were provided earlier in this conversation and are unchanged.)\n\n"
+        # The longest line identifies the details if they are later removed from the history
+        self._staged.setdefault('details', {})[match_id] = (digest, max(details.splitlines(), key=len, default=''))
+        return details
+
+    def commit(self):
+        """Records the staged context as sent."""
+        if 'matches' in self._staged:
+            self.sent_matches = self._staged['matches']
+        self.sent_details.update(self._staged.get('details', {}))
+        self._staged = {}
+
+    def discard(self):
+        """Drops staged context, e.g. when sending the message failed."""
+        self._staged = {}
+
+    def forget(self, text):
+        """
+        Called with context removed from the chat history. If it held the full match list
+        the list is resent next time (deltas mean nothing without it), and details it held
+        are no longer referred back to.
+        """
+        if self.FULL_LIST_HEADER in text:
+            self.sent_matches = None
+        for match_id, (_, line) in list(self.sent_details.items()):
+            if line and line in text:
+                del self.sent_details[match_id]
+
+    def reset(self):
+        """Forgets everything, so the next turn resends the full context."""
+        self.sent_matches = None
+        self.sent_details = {}
+        self._staged = {}
+
+
+# Separates the injected context from the user's own words in a chat message
+USER_QUERY_MARKER = "User Query: "
+
+
+def content_role(content):
+    """Role of a chat history entry (a genai Content or a {'role', 'parts'} dict)."""
+    return content['role'] if isinstance(content, dict) else content.role
+
+
+def content_text(content):
+    """Text of a chat history entry; '' for entries without text (e.g. function calls)."""
+    parts = content['parts'] if isinstance(content, dict) else content.parts
+    return ''.join(p if isinstance(p, str) else getattr(p, 'text', '') or '' for p in parts)
+
+
+class ChatHistoryManager:
+    """
+    Keeps a chat's history within an approximate token budget so long sessions
+    don't get slower and more expensive with every message. The system
+    instructions (the first entry) are always kept. When over budget, the match
+    context injected into older user turns is stripped, oldest first, then the
+    oldest exchanges are dropped and their questions folded into a short running
+    summary. The turn carrying the full match list keeps its context until its
+    exchange is dropped, so the list is not resent every time the history is full.
+    Tokens are estimated at ~4 characters each rather than with a count_tokens
+    round-trip per message.
+    """
+    SUMMARY_PREFIX = "Summary of earlier conversation (older messages were removed). The user previously asked: "
+
+    def __init__(self, token_budget=CHAT_HISTORY_TOKEN_BUDGET, summary_chars=CHAT_HISTORY_SUMMARY_CHARS):
+        self.token_budget = token_budget
+        self.summary_chars = summary_chars
+        self.compactions = 0
+        self.entries_compacted = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def estimate_tokens(text):
+        return len(text) // 4 + 1
+
+    def history_tokens(self, history):
+        # Function calls and responses carry no text; their repr is a fair size estimate
+        return sum(self.estimate_tokens(content_text(c) or str(c)) for c in history)
+
+    def compact(self, chat, incoming="", context_tracker=None):
+        """
+        Trims chat.history so that it and the incoming prompt (context included) fit the
+        budget, and returns the number of entries changed or dropped. Context removed
+        from the history is passed to context_tracker.forget(), so a prompt built before
+        compacting may refer to context that is gone and must be rebuilt.
+        """
+        if self.token_budget <= 0:
+            return 0
+        history = list(chat.history)
+        budget = self.token_budget - self.estimate_tokens(incoming)
+        if len(history) < 2 or self.history_tokens(history) <= budget:
+            return 0
+
+        pinned, turns = history[:1], history[1:]
+        summary = ""
+        if turns and content_text(turns[0]).startswith(self.SUMMARY_PREFIX):
+            summary = content_text(turns.pop(0))[len(self.SUMMARY_PREFIX):]
+        # An exchange starts with a user message that has text (function responses have none)
+        starts = [i for i, c in enumerate(turns) if content_role(c) == 'user' and content_text(c)]
+        latest = starts[-1] if starts else len(turns)
+        changed = 0
+
+        def fits():
+            summary_tokens = self.estimate_tokens(self.SUMMARY_PREFIX + summary) if summary else 0
+            return self.history_tokens(pinned) + summary_tokens + self.history_tokens(turns) <= budget
+
+        def forget(text):
+            if context_tracker is not None:
+                context_tracker.forget(text)
+
+        # 1. Match context in older exchanges is stale: keep only the query, oldest first
+        for i in range(latest):
+            if fits():
+                break
+            text = content_text(turns[i])
+            if content_role(turns[i]) != 'user' or USER_QUERY_MARKER not in text:
+                continue
+            context, query = text.rsplit(USER_QUERY_MARKER, 1)
+            if ChatContextTracker.FULL_LIST_HEADER in context:
+                continue
+            turns[i] = {'role': 'user', 'parts': [query]}
+            forget(context)
+            changed += 1
+
+        # 2. Drop the oldest exchanges, remembering what was asked
+        removed = 0
+        for start in starts[1:]:
+            if fits():
+                break
+            cut = start - removed
+            for c in turns[:cut]:
+                # Function responses have no text; their repr still holds the details sent
+                forget(content_text(c) or str(c))
+            dropped = [content_text(c).strip()[:200] for c in turns[:cut] if content_role(c) == 'user' and content_text(c)]
+            summary = "; ".join(([summary] if summary else []) + dropped)
+            if len(summary) > self.summary_chars:
+                summary = "..." + summary[-self.summary_chars:]
+            del turns[:cut]
+            removed += cut
+            changed += cut
+
+        if changed:
+            summary_entry = [{'role': 'user', 'parts': [self.SUMMARY_PREFIX + summary]}] if summary else []
+            chat.history = pinned + summary_entry + turns
+            with self._lock:
+                self.compactions += 1
+                self.entries_compacted += changed
+        return changed
+
+    def stats(self):
+        """Returns how often histories were compacted and how many entries that touched."""
+        with self._lock:
+            return {"compactions": self.compactions, "entries_compacted": self.entries_compacted}
+
+
+# Words that don't change what a fantasy question asks ("who to pick as captain" ~ "best captain")
+ANSWER_STOPWORDS = frozenset(
+    "a an the to for of in on at as is are be i me my we our you your it this that who which what "
+    "should would could can do does please tell give suggest pick choose select best good top and or with about".split()
+)
+
+
+class AnswerCache:
+    """
+    Thread-safe LRU of chat answers shared by all sessions. Entries are grouped by a
+    fingerprint of the match context the answer was based on; within a group a
+    question hits if its content words are similar enough to a cached one (and it
+    mentions the same numbers). The match data version is part of the group, so a
+    new version simply stops hitting older entries, which expire after ttl seconds
+    or are evicted like any other.
+    """
+    def __init__(self, max_entries=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL, threshold=ANSWER_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries = OrderedDict()  # ((version, fingerprint), terms) -> (answer, expires_at)
+        self._by_group = {}  # (version, fingerprint) -> set of terms
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def terms(query):
+        """Content words of a query, with plurals folded ('captains' -> 'captain')."""
+        words = (w for w in normalise(query).split() if w not in ANSWER_STOPWORDS)
+        return frozenset(w[:-1] if len(w) > 3 and w.endswith('s') else w for w in words)
+
+    @staticmethod
+    def fingerprint(*context):
+        return hashlib.sha1("\x1f".join(str(part) for part in context).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def is_cacheable(match_id, match_details, prompt):
+        """
+        True if a turn's answer may be shared: its prompt must carry the selected match's
+        details. Without a match, or with a reference to details sent earlier, the answer
+        depends on the rest of that chat.
+        """
+        return bool(match_id and match_details and match_details in prompt)
+
+    def similarity(self, first, second):
+        if {t for t in first if t.isdigit()} != {t for t in second if t.isdigit()}:
+            return 0.0
+        return len(first & second) / len(first | second)
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        group = self._by_group.get(key[0])
+        if group is not None:
+            group.discard(key[1])
+            if not group:
+                del self._by_group[key[0]]
+
+    def get(self, query, version, fingerprint):
+        """Returns the cached answer to the most similar question, or None."""
+        terms = self.terms(query)
+        now = time.monotonic()
+        group = (version, fingerprint)
+        with self._lock:
+            best, best_score = None, self.threshold
+            for cached_terms in list(self._by_group.get(group, ())):
+                key = (group, cached_terms)
+                if self._entries[key][1] <= now:
+                    self._remove(key)
+                    continue
+                score = self.similarity(terms, cached_terms) if terms else 0.0
+                if score >= best_score:
+                    best, best_score = key, score
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            return self._entries[best][0]
+
+    def set(self, query, version, fingerprint, answer):
+        terms = self.terms(query)
+        if len(terms) < 2:
+            # Too short to be self-contained ("and him?"), the answer depends on the chat
+            return
+        group = (version, fingerprint)
+        with self._lock:
+            key = (group, terms)
+            self._entries[key] = (answer, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self._by_group.setdefault(group, set()).add(terms)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self):
+        """Returns hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
@@ -0,0 +1,792 @@
+"""
+Client for the cricketdata.org (cricapi) API.
+
+CricketData fetches through the shared response cache, single-flight, quota budget,
+circuit breaker and retries; AsyncCricketData is its asyncio flavour. MatchPoller
+keeps the shared MatchStore warm in the background. Process-wide objects are created
+through st.cache_resource so they survive Streamlit reruns.
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from caching import DiskResponseCache, ResponseCache, SingleFlight, get_cache_ttl, is_live_match
+from config import (
+    CACHE_DB_PATH, CACHE_TTL_CURRENT_MATCHES, CRICKET_API_CONNECT_TIMEOUT, CRICKET_API_DEADLINE, CRICKET_API_MAX_PAGES,
+    CRICKET_API_MAX_RETRIES, CRICKET_API_PAGE_CONCURRENCY, CRICKET_API_POOL_SIZE,
+    CRICKET_API_READ_TIMEOUT, CRICKET_API_STREAM_ENDPOINTS, POLL_IDLE_AFTER, POLL_INTERVAL,
+    POLL_MAX_INTERVAL,
+)
+from decoding import decode_payload
+from match_store import MatchStore
+from models import deep_sizeof, parse_squad
+from resilience import (
+    PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, CircuitBreaker, RequestBudget, backoff_delay,
+    is_retryable_status,
+)
+
+
+# Streamlit re-executes this script on every interaction, so anything that must
+# outlive a single run (connection pools, caches, ...) is created through
+# st.cache_resource and shared by every session in the process.
+@st.cache_resource
+def get_http_session(pool_size=CRICKET_API_POOL_SIZE):
+    """Returns a process-wide keep-alive requests.Session with a bounded connection pool."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+
+@st.cache_resource
+def get_executor(max_workers=CRICKET_API_POOL_SIZE):
+    """Returns a process-wide thread pool for concurrent cricket API calls."""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cricapi')
+
+
+@st.cache_resource
+def get_response_cache():
+    """Returns the process-wide ResponseCache shared by all sessions, disk-backed if CACHE_DB_PATH is set."""
+    disk = DiskResponseCache(CACHE_DB_PATH) if CACHE_DB_PATH else None
+    return ResponseCache(disk=disk)
+
+
+@st.cache_resource
+def get_circuit_breaker():
+    """Returns the process-wide CircuitBreaker guarding cricapi."""
+    return CircuitBreaker()
+
+
+@st.cache_resource
+def get_request_budget():
+    """Returns the process-wide RequestBudget for the cricapi key."""
+    return RequestBudget()
+
+
+@st.cache_resource
+def get_single_flight():
+    """Returns the process-wide SingleFlight used for cricket API calls."""
+    return SingleFlight()
+
+
+# cricapi ends every body with a flat "info" object (hit counters, totalRows, queryTime...)
+# which changes on every call even when the data does not.
+INFO_BLOCK_PATTERN = re.compile(rb'"info"\s*:\s*(\{[^{}\[\]]*\})\s*\}\s*$')
+
+
+def split_info_block(content):
+    """
+    Splits a raw response body into (body_without_info, info_dict). Only the small
+    trailing info object is parsed; info is None if the body does not end with one.
+    """
+    match = INFO_BLOCK_PATTERN.search(content)
+    if not match:
+        return content, None
+    try:
+        return content[:match.start()], json.loads(match.group(1))
+    except ValueError:
+        return content, None
+
+
+@st.cache_resource
+def get_payload_validators():
+    """Process-wide {cache_key: (etag, body_hash)} of the last currentMatches pages seen."""
+    return {}
+
+
+@st.cache_resource
+def get_match_store():
+    """Returns the process-wide MatchStore shared by all sessions."""
+    if POLL_INTERVAL > 0:
+        # The poller refreshes the snapshot every POLL_INTERVAL: serve it until then
+        # instead of making sessions wait on cricapi once CACHE_TTL_CURRENT_MATCHES passes
+        return MatchStore(max_age=max(CACHE_TTL_CURRENT_MATCHES, POLL_INTERVAL))
+    return MatchStore()
+
+
+class AsyncClientPool:
+    """
+    Hands out one shared httpx.AsyncClient per event loop. httpx clients cannot be
+    shared across loops, so each loop (e.g. one asyncio.run per script thread) gets
+    its own pooled, keep-alive client that is reused for the loop's lifetime and
+    closed when the loop shuts down.
+    """
+    def __init__(self, pool_size=CRICKET_API_POOL_SIZE,
+                 connect_timeout=CRICKET_API_CONNECT_TIMEOUT, read_timeout=CRICKET_API_READ_TIMEOUT):
+        import httpx
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._clients = weakref.WeakKeyDictionary()  # loop -> (client, closer)
+        self._lock = threading.Lock()
+
+    async def get_client(self):
+        """Returns the client for the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.get(loop)
+            if entry is not None and not entry[0].is_closed:
+                return entry[0]
+            import httpx
+            client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            closer = self._close_on_shutdown(client)
+            self._clients[loop] = (client, closer)
+        # Starting the generator registers it with the loop: asyncio.run (through
+        # loop.shutdown_asyncgens()) finalises it when the loop ends, closing the client
+        await closer.__anext__()
+        return client
+
+    @staticmethod
+    async def _close_on_shutdown(client):
+        try:
+            yield
+        finally:
+            await client.aclose()
+
+
+@st.cache_resource
+def get_async_client_pool(pool_size=CRICKET_API_POOL_SIZE):
+    """Returns the process-wide AsyncClientPool."""
+    return AsyncClientPool(pool_size)
+
+
+class CricketDataBase:
+    """
+    What the sync and async cricapi clients share: URL building, the process-wide
+    response cache, quota budget and circuit breaker, and the retry policy around
+    each request. It has no fetch methods of its own; CricketData (requests) and
+    AsyncCricketData (httpx) drive the same policy with their own transport.
+    """
+    def __init__(self, API_KEY, connect_timeout=CRICKET_API_CONNECT_TIMEOUT, read_timeout=CRICKET_API_READ_TIMEOUT):
+        self.API_KEY = API_KEY
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = get_response_cache()
+        self.breaker = get_circuit_breaker()
+        self.budget = get_request_budget()
+
+    def get_url(self, url_type, id=None, offset=0):
+        """Constructs the API URL based on type, optional ID and page offset."""
+        base_url = 'https://api.cricapi.com/v1/'
+        if url_type == 'currentMatches':
+            url = f'{base_url}{url_type}?apikey={self.API_KEY}&offset={offset}'
+        else:
+            url = f'{base_url}{url_type}?apikey={self.API_KEY}&offset={offset}&id={id}'
+        return url
+
+    def get_params(self, id=None, offset=0):
+        """Constructs request parameters."""
+        params = {
+            "apikey": self.API_KEY,
+            "offset": offset
+        }
+        if id:
+            params["id"] = id
+        return params
+
+    def get_priority(self, url_type, id=None):
+        """Default quota priority: squads are low, match_info of a known live match is high."""
+        if url_type == 'match_squad':
+            return PRIORITY_LOW
+        if url_type == 'match_info':
+            known = self.cache.get_stale((url_type, id, 0))
+            if known and isinstance(known.get('data'), dict) and is_live_match(known['data']):
+                return PRIORITY_HIGH
+        return PRIORITY_NORMAL
+
+    def _admit(self, url_type, id=None, priority=None):
+        """
+        Checks the quota budget, then the circuit breaker, before a request goes out.
+        Returns None (and counts the call) if it may be sent, otherwise the reason why not.
+        """
+        if priority is None:
+            priority = self.get_priority(url_type, id)
+        if not self.budget.allows(priority):
+            return f"Daily cricket API quota is nearly used up; {url_type} lookups are paused to keep live-match updates going."
+        if not self.breaker.allow():
+            return f"Cricket API for {url_type} is temporarily unavailable, please try again shortly."
+        self.budget.spend()
+        return None
+
+    def _attempt_timeout(self, deadline):
+        """(connect, read) timeouts for one attempt, cut down to what is left before deadline."""
+        remaining = max(deadline - time.monotonic(), 0.001)
+        return min(self.timeout[0], remaining), min(self.timeout[1], remaining)
+
+    @staticmethod
+    def _retry_delay(attempt, deadline):
+        """Seconds to wait before retrying a failed 0-based attempt, or None to give up."""
+        delay = backoff_delay(attempt)
+        if attempt >= CRICKET_API_MAX_RETRIES or time.monotonic() + delay > deadline:
+            return None
+        return delay
+
+    def _check_payload(self, url_type, content):
+        """
+        Decodes a response body. Returns (payload, error_message, retryable): a malformed
+        body is retryable, an API-level failure ('status' is not 'success') is not.
+        """
+        try:
+            payload = decode_payload(content, stream=url_type in CRICKET_API_STREAM_ENDPOINTS)
+        except ValueError as e:
+            # Truncated or malformed JSON body
+            return None, f"Network or API error for {url_type}: {e}", True
+        if not isinstance(payload, dict):
+            return None, f"Network or API error for {url_type}: unexpected {type(payload).__name__} response body", True
+        if payload.get('status') != 'success':
+            return None, f"Cricket API call for {url_type} failed: {payload.get('reason', 'Unknown error')}", False
+        return payload, None, False
+
+    def _finish(self, url_type, id, offset, payload, size, error, retryable, ttl=None):
+        """
+        Records the last attempt's outcome with the breaker and budget and caches a
+        successful response (for ttl seconds, by default the endpoint's TTL). When cricapi could not be reached, stale cached data is
+        served if there is any. Returns a (payload, error_message) tuple.
+        """
+        cache_key = (url_type, id, offset)
+        if retryable:
+            self.breaker.record_failure()
+            return self._serve_stale(cache_key, error)
+        # cricapi answered (even if with an API-level failure), so it is reachable
+        self.breaker.record_success()
+        if error:
+            return None, error
+        self.budget.record(payload.get('info'))
+        if ttl is None:
+            ttl = get_cache_ttl(url_type, payload.get('data'))
+        self.cache.set(cache_key, payload, ttl, size)
+        return payload, None
+
+    def _serve_stale(self, cache_key, error):
+        """Falls back to expired cached data for cache_key; returns (payload, None) or (None, error)."""
+        stale = self.cache.get_stale(cache_key)
+        if stale is not None:
+            return stale, None
+        return None, error
+
+    def _cache_models(self, url_type, id, data, parser):
+        """
+        Returns parser(data). The parsed models are cached next to the raw payload
+        (memory only), so each response is parsed once per process.
+        """
+        models = parser(data)
+        self.cache.set((url_type, id, 'models'), models, get_cache_ttl(url_type, data), deep_sizeof(models), persist=False)
+        return models
+
+
+# This class interacts with the cricketdata.org API
+class CricketData(CricketDataBase):
+    def __init__(self, API_KEY, pool_size=CRICKET_API_POOL_SIZE,
+                 connect_timeout=CRICKET_API_CONNECT_TIMEOUT, read_timeout=CRICKET_API_READ_TIMEOUT):
+        super().__init__(API_KEY, connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self._session = None
+        self.single_flight = get_single_flight()
+        self.validators = get_payload_validators()
+        self.prefetched = 0  # matches speculatively fetched by prefetch_match_bundles
+        self._stats_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        The process-wide keep-alive session (shared so TCP/TLS connections are reused
+        between calls), created on the first request so requests is not imported at startup.
+        """
+        if self._session is None:
+            self._session = get_http_session(self.pool_size)
+        return self._session
+
+    def _fetch(self, url_type, id=None, offset=0, priority=None):
+        """
+        Performs the API request without touching the Streamlit UI, so it is safe to
+        call from worker threads. Fresh responses are served from the shared cache.
+        Returns a (data, error_message) tuple.
+        """
+        payload, error = self._fetch_payload(url_type, id, offset, priority)
+        if error:
+            return None, error
+        return payload.get('data', {}), None
+
+    def _fetch_payload(self, url_type, id=None, offset=0, priority=None):
+        """Like _fetch, but returns the whole response body (data plus the API's 'info' block)."""
+        cache_key = (url_type, id, offset)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached, None
+        def load():
+            # A leader that finished between our cache miss and do() has already stored it
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached, None
+            return self._request(url_type, id, offset, priority)
+
+        # Concurrent callers for the same (endpoint, id) share one upstream request
+        return self.single_flight.do(cache_key, load)
+
+    def _request(self, url_type, id=None, offset=0, priority=None, ttl=None):
+        """
+        Performs the HTTP call with bounded, jittered retries and caches a successful
+        response (see _finish for ttl). While the circuit breaker is open, once retries are exhausted, or when
+        the daily quota is reserved for higher priority calls, stale cached data is
+        served if there is any. Returns a (payload, error_message) tuple.
+        """
+        refusal = self._admit(url_type, id, priority)
+        if refusal:
+            return self._serve_stale((url_type, id, offset), refusal)
+        deadline = time.monotonic() + CRICKET_API_DEADLINE
+        try:
+            for attempt in itertools.count():
+                payload, size, error, retryable = self._attempt(url_type, id, offset, deadline)
+                delay = self._retry_delay(attempt, deadline) if retryable else None
+                if delay is None:
+                    break
+                time.sleep(delay)
+        except Exception:
+            # Never leave a half-open breaker waiting for a trial that died
+            self.breaker.record_failure()
+            raise
+        return self._finish(url_type, id, offset, payload, size, error, retryable, ttl)
+
+    def refresh(self, url_type, id=None, ttl=None, priority=PRIORITY_NORMAL):
+        """
+        Re-fetches a response even if it is cached and keeps it fresh for ttl seconds, so
+        a background refresher can serve it until its next pass. If cricapi cannot be
+        reached the cached copy is left to expire as usual. Returns (data, error_message).
+        """
+        payload, error = self._request(url_type, id, 0, priority, ttl)
+        if error:
+            return None, error
+        return payload.get('data', {}), None
+
+    def _attempt(self, url_type, id, offset, deadline):
+        """
+        Makes a single HTTP call that gives up at deadline (a time.monotonic() value),
+        including while the body is still arriving. Returns (payload, size, error_message,
+        retryable); only network errors, timeouts, 429s and 5xx responses are retryable.
+        currentMatches pages are requested conditionally (ETag) and content-hashed, so
+        an unchanged page reuses the previously parsed payload instead of re-parsing it.
+        """
+        import requests  # loaded with the session; later imports are a sys.modules lookup
+        url = self.get_url(url_type, id, offset)
+        params = self.get_params(id, offset)
+        cache_key = (url_type, id, offset)
+        validator = self.validators.get(cache_key) if url_type == 'currentMatches' else None
+        headers = {'If-None-Match': validator[0]} if validator and validator[0] else None
+        try:
+            response = self.session.get(url, params=params, timeout=self._attempt_timeout(deadline),
+                                        headers=headers, stream=True)
+            with response:
+                response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
+                content = self._read_body(response, deadline)
+        except requests.exceptions.HTTPError as e:
+            return None, 0, f"Network or API error for {url_type}: {e}", is_retryable_status(e.response.status_code)
+        except requests.exceptions.RequestException as e:
+            return None, 0, f"Network or API error for {url_type}: {e}", True
+        if url_type == 'currentMatches':
+            unchanged = self._reuse_unchanged(cache_key, response, content, validator)
+            if unchanged is not None:
+                payload, size = unchanged
+                return payload, size, None, False
+        payload, error, retryable = self._check_payload(url_type, content)
+        if error:
+            return None, 0, error, retryable
+        if url_type == 'currentMatches':
+            body, _ = split_info_block(content)
+            self.validators[cache_key] = (response.headers.get('ETag'), hashlib.sha1(body).hexdigest())
+        return payload, len(content), None, False
+
+    @staticmethod
+    def _read_body(response, deadline):
+        """
+        Reads a streamed response body. The read timeout only bounds each socket read,
+        so a server dripping bytes could otherwise hold the thread far past the deadline;
+        read1 returns whatever one socket read delivers, so the deadline is checked often.
+        """
+        import requests
+        import urllib3
+        read = getattr(response.raw, 'read1', None) or response.raw.read  # urllib3 < 2 has no read1
+        chunks = []
+        try:
+            while True:
+                chunk = read(64 * 1024, decode_content=True)
+                if not chunk:
+                    return b''.join(chunks)
+                chunks.append(chunk)
+                if time.monotonic() > deadline:
+                    raise requests.exceptions.Timeout(f"response body not received within {CRICKET_API_DEADLINE:g}s")
+        except urllib3.exceptions.HTTPError as e:
+            # What requests' own iter_content would have raised
+            raise requests.exceptions.ConnectionError(e) from e
+
+    def _reuse_unchanged(self, cache_key, response, content, validator):
+        """
+        Returns (payload, size) for the previously parsed payload (with a fresh 'info'
+        block) if the server answered 304 or the body hashes the same as last time,
+        otherwise None. size is the cached entry's, as a 304 has no body to measure.
+        """
+        previous = self.cache.get_stale_entry(cache_key)
+        if previous is None or validator is None:
+            # Nothing to reuse (e.g. evicted): forget the validator so the next try is unconditional
+            self.validators.pop(cache_key, None)
+            return None
+        payload, size = previous
+        if response.status_code == 304:
+            return payload, size
+        body, info = split_info_block(content)
+        if info is None or hashlib.sha1(body).hexdigest() != validator[1]:
+            return None
+        return dict(payload, info=info), size
+
+    def _make_api_request(self, url_type, id=None):
+        """Helper to make API requests and handle common errors."""
+        data, error = self._fetch(url_type, id)
+        if error:
+            st.error(error)
+        return data
+
+    def get_match_info(self, match_id):
+        """Fetches detailed information for a specific match."""
+        return self._make_api_request('match_info', match_id)
+
+    def get_match_squad(self, match_id):
+        """Fetches squad details for a specific match."""
+        return self._make_api_request('match_squad', match_id)
+
+    def get_match_squad_models(self, match_id):
+        """Fetches squad details for a specific match as a tuple of TeamSquad models."""
+        models, error = self._fetch_models('match_squad', match_id, parse_squad)
+        if error:
+            st.error(error)
+        return models
+
+    def _fetch_models(self, url_type, id, parser):
+        """Like _fetch, but returns parser(data), parsed once per process (see _cache_models)."""
+        models = self.cache.get((url_type, id, 'models'))
+        if models is not None:
+            return models, None
+        data, error = self._fetch(url_type, id)
+        if data is None:
+            return None, error
+        return self._cache_models(url_type, id, data, parser), None
+
+    def get_match_bundle(self, match_id):
+        """
+        Fetches match_info and match_squad concurrently.
+        Returns {'info': ..., 'squad': ..., 'errors': {part: message}}; info is the raw dict,
+        squad a tuple of TeamSquad models. A failed part is None and its message is reported
+        under 'errors' instead of being shown in the UI.
+        """
+        executor = get_executor()
+        futures = {
+            'info': executor.submit(self._fetch, 'match_info', match_id),
+            'squad': executor.submit(self._fetch_models, 'match_squad', match_id, parse_squad),
+        }
+        bundle = {'errors': {}}
+        for part, future in futures.items():
+            try:
+                data, error = future.result()
+            except Exception as e:
+                data, error = None, f"Unexpected error fetching match {part}: {e}"
+            bundle[part] = data
+            if error:
+                bundle['errors'][part] = error
+        return bundle
+
+    def prefetch_match_bundles(self, match_ids):
+        """
+        Speculatively fetches match_info and match_squad for match_ids into the cache, at
+        low quota priority. Returns the futures: cancel them once the intent is known;
+        a later get_match_bundle joins fetches in flight and reuses finished ones.
+        """
+        executor = get_executor()
+        futures = []
+        with self._stats_lock:
+            self.prefetched += len(match_ids)
+        for match_id in match_ids:
+            futures.append(executor.submit(self._fetch, 'match_info', match_id, 0, PRIORITY_LOW))
+            futures.append(executor.submit(self._fetch_models, 'match_squad', match_id, parse_squad))
+        return futures
+
+    def stats(self):
+        """Returns the shared response cache and quota figures and the number of matches prefetched."""
+        with self._stats_lock:
+            prefetched = self.prefetched
+        return {"cache": self.cache.stats(), "budget": self.budget.stats(), "prefetched": prefetched}
+
+    def get_current_matches(self):
+        """Fetches a list of all current matches."""
+        # Note: currentMatches returns a list, not a dict like match_info/squad
+        return self._make_api_request('currentMatches')
+
+    def iter_current_matches(self, max_pages=CRICKET_API_MAX_PAGES,
+                             concurrency=CRICKET_API_PAGE_CONCURRENCY, errors=None, priority=None):
+        """Yields current matches one by one across all pages (see iter_current_match_pages)."""
+        for page in self.iter_current_match_pages(max_pages, concurrency, errors, priority):
+            yield from page
+
+    def iter_current_match_pages(self, max_pages=CRICKET_API_MAX_PAGES,
+                                 concurrency=CRICKET_API_PAGE_CONCURRENCY, errors=None, priority=None):
+        """
+        Yields pages (lists) of current matches, stopping at the API's info.totalRows.
+        The first page is yielded as soon as it arrives; later offsets are fetched with
+        bounded concurrency and yielded in order. Error messages are appended to errors.
+        Every page is requested at the given quota priority (default: get_priority).
+        """
+        payload, error = self._fetch_payload('currentMatches', priority=priority)
+        if error:
+            if errors is not None:
+                errors.append(error)
+            return
+        first_page = payload.get('data') or []
+        if first_page:
+            yield first_page
+
+        page_size = len(first_page)
+        total_rows = (payload.get('info') or {}).get('totalRows') or 0
+        if not page_size or total_rows <= page_size:
+            return
+        offsets = range(page_size, total_rows, page_size)
+        if max_pages:
+            offsets = offsets[:max_pages - 1]
+        offsets = iter(offsets)
+
+        executor = get_executor()
+        pending = deque(
+            executor.submit(self._fetch_payload, 'currentMatches', None, offset, priority)
+            for offset in itertools.islice(offsets, max(concurrency, 1))
+        )
+        try:
+            while pending:
+                payload, error = pending.popleft().result()
+                next_offset = next(offsets, None)
+                if next_offset is not None:
+                    pending.append(executor.submit(self._fetch_payload, 'currentMatches', None, next_offset, priority))
+                if error:
+                    if errors is not None:
+                        errors.append(error)
+                    return
+                page = payload.get('data') or []
+                if not page:
+                    return
+                yield page
+        finally:
+            # Stopped early (error, empty page or the caller broke out): drop queued pages
+            for future in pending:
+                future.cancel()
+
+
+@st.cache_resource
+def get_cricket_data(api_key):
+    """Returns the process-wide CricketData client."""
+    return CricketData(api_key)
+
+
+class MatchPoller:
+    """
+    Daemon thread that keeps the shared MatchStore and the cached match_info of live
+    matches warm, so user-facing lookups are served from memory. Each pass refetches
+    them and keeps them fresh until the next one (stale-while-revalidate), so between
+    passes sessions see data up to interval seconds old instead of waiting on cricapi.
+    When no session has checked in for idle_after seconds the polling interval doubles
+    each cycle, up to max_interval; cached data then expires at its usual TTLs.
+    """
+    def __init__(self, cricket_data, match_store, interval=POLL_INTERVAL,
+                 idle_after=POLL_IDLE_AFTER, max_interval=POLL_MAX_INTERVAL):
+        self.cricket_data = cricket_data
+        self.match_store = match_store
+        self.interval = interval
+        self.idle_after = idle_after
+        self.max_interval = max_interval
+        self.current_interval = interval
+        self.last_heartbeat = time.monotonic()
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='match-poller', daemon=True)
+
+    def start(self):
+        """Starts the polling thread."""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the polling thread after the current cycle."""
+        self._stop.set()
+        self._wake.set()
+
+    def heartbeat(self):
+        """Called by active sessions; resets any idle back-off."""
+        self.last_heartbeat = time.monotonic()
+        if self.current_interval > self.interval:
+            self.current_interval = self.interval
+            self._wake.set()
+
+    def poll_once(self):
+        """Refreshes currentMatches and match_info for every live match."""
+        snapshot, error = self.match_store.get_snapshot(self.cricket_data, force=True, priority=PRIORITY_LOW)
+        self.last_error = error
+        if not snapshot:
+            return
+        # Fresh until the next pass, with slack for the pass itself
+        ttl = self.interval + CRICKET_API_DEADLINE
+        for match in snapshot['matches']:
+            if is_live_match(match) and match.get('id'):
+                # Background warming: must not eat the quota kept for users' live-match lookups
+                _, error = self.cricket_data.refresh('match_info', match['id'], ttl, priority=PRIORITY_LOW)
+                if error:
+                    self.last_error = error
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                # Never let a bad cycle kill the thread
+                self.last_error = f"Poller error: {e}"
+            if time.monotonic() - self.last_heartbeat > self.idle_after:
+                self.current_interval = min(self.current_interval * 2, self.max_interval)
+            self._wake.wait(self.current_interval)
+            self._wake.clear()
+
+
+@st.cache_resource
+def get_match_poller(api_key):
+    """Starts (once per process) the background poller feeding the shared MatchStore."""
+    return MatchPoller(get_cricket_data(api_key), get_match_store()).start()
+
+
+class AsyncCricketData(CricketDataBase):
+    """
+    Asyncio flavour of CricketData: the same lookups as coroutines, sharing its cache,
+    quota budget, circuit breaker and retry policy. Lets a single worker overlap many
+    cricket API lookups (and Gemini calls). There is no single-flight here, as its
+    waiting would block the event loop.
+    """
+    def __init__(self, API_KEY, pool_size=CRICKET_API_POOL_SIZE):
+        super().__init__(API_KEY)
+        self.client_pool = get_async_client_pool(pool_size)
+
+    async def _fetch(self, url_type, id=None, offset=0, priority=None):
+        """Async counterpart of CricketData._fetch. Returns a (data, error_message) tuple."""
+        payload, error = await self._fetch_payload(url_type, id, offset, priority)
+        if error:
+            return None, error
+        return payload.get('data', {}), None
+
+    async def _fetch_payload(self, url_type, id=None, offset=0, priority=None):
+        """Async counterpart of CricketData._fetch_payload."""
+        cached = self.cache.get((url_type, id, offset))
+        if cached is not None:
+            return cached, None
+        return await self._request(url_type, id, offset, priority)
+
+    async def _request(self, url_type, id=None, offset=0, priority=None):
+        """Async counterpart of CricketData._request."""
+        refusal = self._admit(url_type, id, priority)
+        if refusal:
+            return self._serve_stale((url_type, id, offset), refusal)
+        deadline = time.monotonic() + CRICKET_API_DEADLINE
+        try:
+            for attempt in itertools.count():
+                payload, size, error, retryable = await self._attempt(url_type, id, offset, deadline)
+                delay = self._retry_delay(attempt, deadline) if retryable else None
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+        except Exception:
+            # Never leave a half-open breaker waiting for a trial that died. Cancellation is
+            # not a failure of cricapi; a cancelled trial expires after reset_timeout instead
+            self.breaker.record_failure()
+            raise
+        return self._finish(url_type, id, offset, payload, size, error, retryable)
+
+    async def _attempt(self, url_type, id, offset, deadline):
+        """
+        Makes a single HTTP call that gives up at deadline (a time.monotonic() value);
+        returns (payload, size, error_message, retryable).
+        """
+        import httpx  # already loaded by AsyncClientPool
+        connect_timeout, read_timeout = self._attempt_timeout(deadline)
+        try:
+            client = await self.client_pool.get_client()
+            response = await asyncio.wait_for(
+                client.get(self.get_url(url_type, id, offset), params=self.get_params(id, offset),
+                           timeout=httpx.Timeout(read_timeout, connect=connect_timeout)),
+                max(deadline - time.monotonic(), 0.001),
+            )
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            return None, 0, f"Network or API error for {url_type}: {e}", is_retryable_status(e.response.status_code)
+        except httpx.HTTPError as e:
+            return None, 0, f"Network or API error for {url_type}: {e}", True
+        except asyncio.TimeoutError:
+            return None, 0, f"Network or API error for {url_type}: no response within {CRICKET_API_DEADLINE:g}s", True
+        payload, error, retryable = self._check_payload(url_type, response.content)
+        if error:
+            return None, 0, error, retryable
+        return payload, len(response.content), None, False
+
+    async def _fetch_models(self, url_type, id, parser):
+        """Async counterpart of CricketData._fetch_models."""
+        models = self.cache.get((url_type, id, 'models'))
+        if models is not None:
+            return models, None
+        data, error = await self._fetch(url_type, id)
+        if data is None:
+            return None, error
+        return self._cache_models(url_type, id, data, parser), None
+
+    async def _make_api_request(self, url_type, id=None):
+        """Helper to make API requests and handle common errors."""
+        data, error = await self._fetch(url_type, id)
+        if error:
+            st.error(error)
+        return data
+
+    async def get_match_info(self, match_id):
+        """Fetches detailed information for a specific match."""
+        return await self._make_api_request('match_info', match_id)
+
+    async def get_match_squad(self, match_id):
+        """Fetches squad details for a specific match."""
+        return await self._make_api_request('match_squad', match_id)
+
+    async def get_match_squad_models(self, match_id):
+        """Fetches squad details for a specific match as a tuple of TeamSquad models."""
+        models, error = await self._fetch_models('match_squad', match_id, parse_squad)
+        if error:
+            st.error(error)
+        return models
+
+    async def get_match_bundle(self, match_id):
+        """Fetches match_info and match_squad concurrently, same shape as CricketData.get_match_bundle."""
+        results = await asyncio.gather(
+            self._fetch('match_info', match_id),
+            self._fetch_models('match_squad', match_id, parse_squad),
+            return_exceptions=True,
+        )
+        bundle = {'errors': {}}
+        for part, result in zip(('info', 'squad'), results):
+            if isinstance(result, Exception):
+                data, error = None, f"Unexpected error fetching match {part}: {result}"
+            else:
+                data, error = result
+            bundle[part] = data
+            if error:
+                bundle['errors'][part] = error
+        return bundle
+
+    async def get_current_matches(self):
+        """Fetches a list of all current matches."""
+        return await self._make_api_request('currentMatches')
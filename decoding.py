@@ -0,0 +1,93 @@
+"""
+JSON decoding backends for cricapi payloads.
+
+orjson or ujson are used when installed (fastest first), falling back to the stdlib
+json module. For the largest endpoints an optional streaming decoder (needs ijson)
+builds the payload event by event and leaves out subtrees the app never reads, such
+as the scorecard of match_info. The trade-off: the decoded payload (what the cache
+keeps) is much smaller, but decoding is several times slower and its peak memory is
+higher than the stdlib's, as ijson's events are materialised along the way (see
+benchmarks/bench_decode.py).
+"""
+import json
+
+from config import JSON_BACKEND
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# Available backends, fastest first. Every loads() accepts bytes.
+BACKENDS = {}
+if orjson is not None:
+    BACKENDS['orjson'] = orjson.loads
+if ujson is not None:
+    BACKENDS['ujson'] = ujson.loads
+BACKENDS['json'] = json.loads
+
+# JSON_BACKEND forces a backend; otherwise the fastest installed one is used
+DEFAULT_BACKEND = JSON_BACKEND if JSON_BACKEND in BACKENDS else next(iter(BACKENDS))
+
+# Dotted paths dropped by the streaming decoder
+DEFAULT_SKIP_PATHS = ('data.scorecard',)
+
+
+def decode(content, backend=None):
+    """Decodes a JSON document (bytes or str) with the given or default backend."""
+    return BACKENDS[backend or DEFAULT_BACKEND](content)
+
+
+def stream_decode(content, skip_paths=DEFAULT_SKIP_PATHS):
+    """
+    Decodes content incrementally, leaving out the subtrees at skip_paths.
+    Falls back to decode() when ijson is not installed. Malformed input raises
+    ValueError, like the other backends.
+    """
+    if ijson is None:
+        return decode(content)
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    skip_paths = set(skip_paths)
+    builder = ijson.ObjectBuilder()
+    skip_value = False  # the next value belongs to a skipped key
+    depth = 0  # nesting depth inside a skipped container
+    for prefix, event, value in _parse_events(content):
+        if skip_value or depth:
+            skip_value = False
+            if event in ('start_map', 'start_array'):
+                depth += 1
+            elif event in ('end_map', 'end_array'):
+                depth -= 1
+            continue
+        if event == 'map_key' and (f'{prefix}.{value}' if prefix else value) in skip_paths:
+            skip_value = True
+            continue
+        builder.event(event, value)
+    return builder.value
+
+
+def _parse_events(content):
+    """ijson event stream that raises ValueError (not ijson.JSONError) on bad input."""
+    try:
+        yield from ijson.parse(content, use_float=True)
+    except ijson.JSONError as e:
+        raise ValueError(f"Invalid JSON: {e}") from e
+
+
+def decode_payload(content, stream=False, skip_paths=DEFAULT_SKIP_PATHS):
+    """Decodes a cricapi response body, using the streaming decoder when stream is True."""
+    if stream:
+        return stream_decode(content, skip_paths)
+    return decode(content)
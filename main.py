@@ -1,101 +1,107 @@
-import os
-import requests
 import streamlit as st
-import google.generativeai as genai
-from dotenv import load_dotenv
 import re # Import regex for potential fallback or simpler parsing
 import json # Import json for parsing LLM structured response
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Retrieve API keys and system prompt
-CRICKET_API_KEY = os.getenv('CRICKET_API_KEY')
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-SYSTEM_PROMPT = os.getenv('SYSTEM_PROMPT') 
-
-
-# This class interacts with the cricketdata.org API
-class CricketData:
-    def __init__(self, API_KEY):
-        self.API_KEY = API_KEY
-
-    def get_url(self, url_type, id=None):
-        """Constructs the API URL based on type and optional ID."""
-        base_url = 'https://api.cricapi.com/v1/'
-        if url_type == 'currentMatches':
-            url = f'{base_url}{url_type}?apikey={self.API_KEY}&offset=0'
-        else:
-            url = f'{base_url}{url_type}?apikey={self.API_KEY}&offset=0&id={id}'
-        return url
-
-    def get_params(self, id=None):
-        """Constructs request parameters."""
-        params = {
-            "apikey": self.API_KEY,
-            "offset": 0
-        }
-        if id:
-            params["id"] = id
-        return params
-
-    def _make_api_request(self, url_type, id=None):
-        """Helper to make API requests and handle common errors."""
-        url = self.get_url(url_type, id)
-        params = self.get_params(id)
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
-            data = response.json()
-            if data.get('status') != 'success':
-                st.error(f"Cricket API call for {url_type} failed: {data.get('reason', 'Unknown error')}")
-                return None
-            return data.get('data', {})
-        except requests.exceptions.RequestException as e:
-            st.error(f"Network or API error for {url_type}: {e}")
-            return None
-
-    def get_match_info(self, match_id):
-        """Fetches detailed information for a specific match."""
-        return self._make_api_request('match_info', match_id)
-
-    def get_match_squad(self, match_id):
-        """Fetches squad details for a specific match."""
-        return self._make_api_request('match_squad', match_id)
-
-    def get_current_matches(self):
-        """Fetches a list of all current matches."""
-        # Note: currentMatches returns a list, not a dict like match_info/squad
-        return self._make_api_request('currentMatches')
+from config import (
+    ANSWER_CACHE_SIZE, CRICKET_API_KEY, GEMINI_API_KEY, LLM_INTENT_MODE, LOCAL_RESOLVER_THRESHOLD,
+    POLL_INTERVAL, PREFETCH_CANDIDATES, SYSTEM_PROMPT,
+)
+from conversation import (
+    USER_QUERY_MARKER, AnswerCache, ChatContextTracker, ChatHistoryManager, IntentCache,
+    StreamRenderer, format_match_details, stream_reply,
+)
+from cricket_api import get_cricket_data, get_match_poller, get_match_store
+
+# Settings (and the .env file) are handled by config.py; the API client, caches and
+# chat helpers live in their own modules so they can be imported without the app.
+# Heavy SDKs (requests, httpx, google.generativeai, python-dotenv) are imported on
+# first use rather than here, so the first page renders sooner on a cold start.
+
+
+@st.cache_resource
+def get_intent_cache():
+    """Returns the process-wide IntentCache."""
+    return IntentCache()
+
+
+# Function the chat model can call in single_call mode instead of a separate intent request
+MATCH_DETAILS_TOOL = {
+    "function_declarations": [{
+        "name": "get_match_details",
+        "description": (
+            "Fetches detailed info and squads for one of the current matches. Call it when the "
+            "user asks about a specific match, by its number in the current match list or by its name."
+        ),
+        "parameters": {
+            "type": "OBJECT",
+            "properties": {
+                "match_number": {"type": "INTEGER", "description": "The 1-based index of the match if referred by number"},
+                "match_name": {"type": "STRING", "description": "The full name of the match if referred by name"},
+            },
+        },
+    }]
+}
 
 
 # This class handles interactions with the Gemini API
 class LLM:
     def __init__(self, API_KEY, system_prompt):
         self.API_KEY = API_KEY
+        import google.generativeai as genai  # slow to import, so only loaded with the first LLM
         genai.configure(api_key=self.API_KEY)
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+        # In single_call mode the chat model resolves matches itself via get_match_details
+        self.single_call = LLM_INTENT_MODE == 'single_call'
+        self.model = genai.GenerativeModel("gemini-2.0-flash", tools=[MATCH_DETAILS_TOOL] if self.single_call else None)
         # Initialize a separate model for structured intent recognition
         self.intent_model = genai.GenerativeModel("gemini-2.0-flash")
+        # Intents already extracted for the same query and match list, shared across sessions
+        self.intent_cache = get_intent_cache()
+        # Keeps each chat's history within CHAT_HISTORY_TOKEN_BUDGET
+        self.history_manager = ChatHistoryManager()
 
 
-        # Initialize chat history with system instructions
-        system_instructions = {
+        # System instructions seeded into every chat; chats themselves are per session
+        self.system_instructions = {
             "role": "user",
             "parts": [system_prompt]
         }
-        self.chat = self.model.start_chat(history=[system_instructions])
 
-    def get_response(self, prompt, stream=True):
-        """Sends a prompt to the Gemini model and returns the response."""
-        response = self.chat.send_message(prompt, stream=stream)
+    def start_chat(self):
+        """Starts a new chat (one per user session) seeded with the system instructions."""
+        return self.model.start_chat(history=[self.system_instructions])
+
+    def get_response(self, chat, prompt, stream=True):
+        """Sends a prompt to the given chat and returns the response."""
+        response = chat.send_message(prompt, stream=stream)
         return response
 
+    def record_exchange(self, chat, prompt, answer):
+        """Adds a prompt and an answer that didn't come from the model (e.g. cached) to the chat history."""
+        chat.history = list(chat.history) + [
+            {"role": "user", "parts": [prompt]},
+            {"role": "model", "parts": [answer]},
+        ]
+
+    def send_function_result(self, chat, name, result, stream=True, allow_tools=True):
+        """
+        Answers a function call from the model; the model continues the same turn.
+        With allow_tools=False the model must answer in text instead of calling again.
+        """
+        from google.generativeai import protos
+        part = protos.Part(function_response=protos.FunctionResponse(name=name, response={"result": result}))
+        tool_config = None if allow_tools else {"function_calling_config": {"mode": "NONE"}}
+        return chat.send_message(protos.Content(role="user", parts=[part]), stream=stream, tool_config=tool_config)
+
     def get_match_intent(self, user_query, current_matches_summary):
         """
         Uses LLM to extract match number or name from user query.
         Returns a dictionary like {'match_number': int} or {'match_name': str} or None.
+        Answers are memoised per (normalised query, match list).
         """
+        cache_key = IntentCache.make_key(user_query, current_matches_summary)
+        cached_intent = self.intent_cache.get(cache_key)
+        if cached_intent is not None:
+            return cached_intent
+
         prompt = f"""
         Given the user query and the list of current matches, identify if the user is asking about a specific match by its number or name.
 
@@ -133,6 +139,8 @@ class LLM:
             )
             # The response.text will be a JSON string
             parsed_json = json.loads(response.text)
+            # Only real LLM answers are cached, never the regex fallback below
+            self.intent_cache.set(cache_key, parsed_json)
             return parsed_json
         except Exception as e:
             st.warning(f"Could not parse match intent from LLM: {e}. Falling back to regex.")
@@ -146,19 +154,30 @@ class LLM:
             return {}
 
 
+
+@st.cache_resource
+def get_answer_cache():
+    """Returns the process-wide AnswerCache."""
+    return AnswerCache()
+
+
+@st.cache_resource
+def get_llm(api_key, system_prompt):
+    """Returns the process-wide LLM: genai is configured and the models built only once."""
+    return LLM(api_key, system_prompt)
+
+
 # --- Main Streamlit Application Logic ---
 
-# Initialize API clients
-cricket_data = CricketData(CRICKET_API_KEY)
-llm_model = LLM(GEMINI_API_KEY, SYSTEM_PROMPT)
+# Initialize API clients (created once per process, not on every rerun).
+# The LLM is only created once a user sends a message, see below.
+cricket_data = get_cricket_data(CRICKET_API_KEY)
 
 # Set up Streamlit page configuration
 st.set_page_config(page_title="Fantasy Chat Assistant", layout="centered")
 st.title("Fantasy Cricket Assistant")
 
 # Initialize session state variables if they don't exist
-if "chat" not in st.session_state:
-    st.session_state['chat'] = llm_model.chat
 if "messages" not in st.session_state:
     st.session_state['messages'] = []
 # New session state variable to store current match data
@@ -167,6 +186,28 @@ if "current_match_data" not in st.session_state:
 # New session state variable to store simplified match list for LLM intent parsing
 if "match_list_for_llm" not in st.session_state:
     st.session_state['match_list_for_llm'] = []
+# Reference to the shared MatchRegistry for the current match data
+if "match_registry" not in st.session_state:
+    st.session_state['match_registry'] = None
+if "match_resolver" not in st.session_state:
+    st.session_state['match_resolver'] = None
+# Version of the shared MatchStore snapshot this session is looking at
+if "match_data_version" not in st.session_state:
+    st.session_state['match_data_version'] = 0
+
+# Keep the shared match data warm in the background while sessions are active
+if POLL_INTERVAL > 0:
+    get_match_poller(CRICKET_API_KEY).heartbeat()
+
+# Once this session has loaded matches, follow newer shared snapshots (e.g. from the poller)
+latest_snapshot = get_match_store().snapshot
+if (st.session_state.current_match_data and latest_snapshot
+        and latest_snapshot['version'] > st.session_state.match_data_version):
+    st.session_state.current_match_data = latest_snapshot['matches']
+    st.session_state.match_list_for_llm = latest_snapshot['match_list']
+    st.session_state.match_registry = latest_snapshot['registry']
+    st.session_state.match_resolver = latest_snapshot['resolver']
+    st.session_state.match_data_version = latest_snapshot['version']
 
 # --- Display Previous Messages ---
 # Iterate through the history and display all messages
@@ -177,21 +218,29 @@ for message in st.session_state.messages:
 # --- Fetch Latest Matches Button ---
 if st.button("Fetch Latest Matches"):
     with st.spinner("Fetching current matches..."):
-        matches = cricket_data.get_current_matches()
-        if matches:
+        # Render the first page right away while later pages are still loading
+        progress_area = st.empty()
+        def show_progress(matches_so_far):
+            preview = "\n".join(f"{i+1}. {m.get('name', 'N/A')}" for i, m in enumerate(matches_so_far[:5]))
+            progress_area.markdown(f"Loaded {len(matches_so_far)} matches so far...\n\n{preview}")
+
+        # Shared by all sessions: the session only keeps references to the store's snapshot
+        snapshot, error = get_match_store().get_snapshot(cricket_data, on_progress=show_progress)
+        progress_area.empty()
+        if error:
+            st.error(error)
+        if snapshot:
+            matches = snapshot['matches']
             st.session_state.current_match_data = matches
-            match_summary = []
-            # Store the full match details in a more accessible way for intent parsing
-            st.session_state.match_list_for_llm = [] 
-            for i, m in enumerate(matches): # Iterate through all fetched matches
-                # Only display top 5 for brevity in summary, but store all for lookup
-                if i < 5:
-                    match_summary.append(f"{i+1}. **{m.get('name', 'N/A')}** - {m.get('status', 'N/A')}")
-                st.session_state.match_list_for_llm.append({
-                    "index": i + 1,
-                    "name": m.get('name', 'N/A'),
-                    "id": m.get('id', 'N/A')
-                })
+            st.session_state.match_list_for_llm = snapshot['match_list']
+            st.session_state.match_registry = snapshot['registry']
+            st.session_state.match_resolver = snapshot['resolver']
+            st.session_state.match_data_version = snapshot['version']
+            # Only display top 5 for brevity in summary, but all are stored for lookup
+            match_summary = [
+                f"{i+1}. **{m.get('name', 'N/A')}** - {m.get('status', 'N/A')}"
+                for i, m in enumerate(matches[:5])
+            ]
             
             formatted_matches = "\n".join(match_summary)
             
@@ -213,6 +262,18 @@ if st.button("Fetch Latest Matches"):
 user_input = st.chat_input("Let's Build your team")
 
 if user_input:
+    # The LLM (and google.generativeai) is loaded on first use, and each session's
+    # chat is only started with its first message
+    llm_model = get_llm(GEMINI_API_KEY, SYSTEM_PROMPT)
+    if "chat" not in st.session_state:
+        st.session_state['chat'] = llm_model.start_chat()
+        st.session_state.pop('context_tracker', None)
+    # Tracks which match context this chat has already been sent
+    if "context_tracker" not in st.session_state:
+        st.session_state['context_tracker'] = ChatContextTracker()
+    context_tracker = st.session_state.context_tracker
+    context_tracker.discard()
+
     # Display user message immediately
     with st.chat_message("user"):
         st.markdown(user_input)
@@ -229,98 +290,141 @@ if user_input:
         try:
             full_prompt_to_gemini = user_input
             detailed_match_info_for_llm = ""
+            match_details = ""
             
-            # --- Step 1: Try to extract match intent using LLM ---
+            # --- Step 1: Try to extract match intent (locally, then with the LLM) ---
             selected_match_id = None
             selected_match_name = None # Initialize selected_match_name
-            if st.session_state.current_match_data and st.session_state.match_list_for_llm:
-                # Prepare a summary of current matches for the intent LLM
-                current_matches_summary_text = "\n".join([
-                    f"{m['index']}. {m['name']}" for m in st.session_state.match_list_for_llm
-                ])
-                
-                match_intent = llm_model.get_match_intent(user_input, current_matches_summary_text)
+            match_intent = {}
+            prefetch_futures = []
+            if st.session_state.current_match_data and st.session_state.match_registry:
+                # Cheap local resolution first (number, team names, similarity); the LLM is
+                # only asked when the local resolver is not confident
+                match_intent, confidence = st.session_state.match_resolver.resolve(user_input)
+                if confidence < LOCAL_RESOLVER_THRESHOLD and PREFETCH_CANDIDATES > 0:
+                    # Hide cricapi latency behind the LLM's: start fetching the likeliest matches now
+                    candidates = st.session_state.match_resolver.candidates(user_input, PREFETCH_CANDIDATES)
+                    if candidates:
+                        prefetch_futures = cricket_data.prefetch_match_bundles([m.id for m in candidates])
+                if confidence >= LOCAL_RESOLVER_THRESHOLD:
+                    llm_model.intent_cache.record_local()
+                elif llm_model.single_call:
+                    # No separate intent call: the chat model calls get_match_details if needed
+                    match_intent = {}
+                else:
+                    # Prepare a summary of current matches for the intent LLM
+                    current_matches_summary_text = "\n".join([
+                        f"{m['index']}. {m['name']}" for m in st.session_state.match_list_for_llm
+                    ])
+
+                    match_intent = llm_model.get_match_intent(user_input, current_matches_summary_text)
 
                 if match_intent:
-                    if "match_number" in match_intent:
-                        match_index = match_intent["match_number"] - 1 # Convert to 0-based index
-                        if 0 <= match_index < len(st.session_state.current_match_data):
-                            selected_match_id = st.session_state.current_match_data[match_index].get('id')
-                            selected_match_name = st.session_state.current_match_data[match_index].get('name')
-                            st.write(f"DEBUG: Identified match by number: {selected_match_name} (ID: {selected_match_id})")
-                        else:
-                            st.warning(f"Match number {match_intent['match_number']} is out of range.")
+                    # Constant-time lookup by number, normalised name, team pair or team
+                    selected_match = st.session_state.match_registry.resolve(match_intent)
+                    if selected_match:
+                        selected_match_id = selected_match.id
+                        selected_match_name = selected_match.name
+                        st.write(f"DEBUG: Identified match: {selected_match_name} (ID: {selected_match_id})")
+                    elif "match_number" in match_intent:
+                        st.warning(f"Match number {match_intent['match_number']} is out of range.")
                     elif "match_name" in match_intent:
-                        # Find match by name
-                        for m in st.session_state.current_match_data:
-                            if m.get('name', '').lower() == match_intent["match_name"].lower():
-                                selected_match_id = m.get('id')
-                                selected_match_name = m.get('name')
-                                st.write(f"DEBUG: Identified match by name: {selected_match_name} (ID: {selected_match_id})")
-                                break
-                        if not selected_match_id:
-                            st.warning(f"Could not find match with name: {match_intent['match_name']}.")
-                else:
+                        st.warning(f"Could not find match with name: {match_intent['match_name']}.")
+                elif not llm_model.single_call:
                     st.write("DEBUG: No specific match intent detected by LLM.")
+                if not llm_model.single_call:
+                    # The intent is known: drop prefetches that haven't started (finished ones stay cached)
+                    for future in prefetch_futures:
+                        future.cancel()
 
             # --- Step 2: If a match ID was identified, fetch its details ---
+            def fetch_match_details(match_id, match_name):
+                with st.spinner(f"Fetching details for {match_name or 'the selected match'}..."):
+                    # info and squad are fetched concurrently; errors are reported per part
+                    match_bundle = cricket_data.get_match_bundle(match_id)
+                for error in match_bundle['errors'].values():
+                    st.error(error)
+                return format_match_details(match_id, match_name, match_bundle)
+
             if selected_match_id:
-                with st.spinner(f"Fetching details for {selected_match_name or 'the selected match'}..."):
-                    match_info = cricket_data.get_match_info(selected_match_id)
-                    match_squad = cricket_data.get_match_squad(selected_match_id)
-
-                if match_info:
-                    detailed_match_info_for_llm += f"Detailed Info for Match ID {selected_match_id} ({selected_match_name or 'N/A'}):\n"
-                    for key, value in match_info.items():
-                        if isinstance(value, (str, int, float, bool)):
-                            detailed_match_info_for_llm += f"- {key}: {value}\n"
-                    detailed_match_info_for_llm += "\n"
-
-                if match_squad:
-                    detailed_match_info_for_llm += "Squads:\n"
-                    for team_squad in match_squad:
-                        team_name = team_squad.get('name', 'Unknown Team')
-                        players = [player.get('name', 'N/A') for player in team_squad.get('players', [])]
-                        detailed_match_info_for_llm += f"  - {team_name}: {', '.join(players)}\n"
-                    detailed_match_info_for_llm += "\n"
+                match_details = fetch_match_details(selected_match_id, selected_match_name)
             elif st.session_state.current_match_data and (match_intent and ("match_number" in match_intent or "match_name" in match_intent)):
                  # If LLM identified a match but it wasn't found in our data or ID was missing
                  detailed_match_info_for_llm = "I understood you were asking about a specific match, but I couldn't find its details or ID. Please ensure the match number/name is correct and try again."
 
 
             # --- Step 3: Combine all available context for the main LLM ---
-            context_for_llm = ""
-            if st.session_state.current_match_data:
-                # Always provide the general list of current matches if available
-                general_match_data_for_llm = "\n".join([
-                    f"Match: {m.get('name', 'N/A')}, Status: {m.get('status', 'N/A')}, ID: {m.get('id', 'N/A')}"
-                    for m in st.session_state.current_match_data
-                ])
-                context_for_llm += f"General Current Match Data:\n{general_match_data_for_llm}\n\n"
-            
-            if detailed_match_info_for_llm:
-                context_for_llm += detailed_match_info_for_llm + "\n"
-
-            if context_for_llm:
-                full_prompt_to_gemini = f"{context_for_llm}User Query: {user_input}"
+            def build_prompt():
+                context_for_llm = ""
+                if st.session_state.current_match_data:
+                    # The general list of current matches is sent once per chat; later
+                    # turns only carry changes to it (the chat history keeps the rest)
+                    context_for_llm += context_tracker.match_list_context(st.session_state.current_match_data)
+
+                if match_details:
+                    # Unchanged details already in this chat's history are not sent again
+                    context_for_llm += context_tracker.details_context(selected_match_id, match_details) + "\n"
+                elif detailed_match_info_for_llm:
+                    context_for_llm += detailed_match_info_for_llm + "\n"
+
+                if context_for_llm:
+                    return f"{context_for_llm}{USER_QUERY_MARKER}{user_input}"
+                return user_input # If no context, just send user query
+
+            full_prompt_to_gemini = build_prompt()
+            # Trim old turns and stale match context so the history plus this prompt fit the
+            # budget. Context the prompt referred back to may be gone: rebuild it and re-check
+            while llm_model.history_manager.compact(st.session_state.chat, full_prompt_to_gemini, context_tracker):
+                context_tracker.discard()
+                full_prompt_to_gemini = build_prompt()
+
+            # Near-identical questions about the same match data are answered from the cache
+            answerable = AnswerCache.is_cacheable(selected_match_id, match_details, full_prompt_to_gemini)
+            answer_cache = get_answer_cache() if ANSWER_CACHE_SIZE > 0 and answerable else None
+            answer_fingerprint = AnswerCache.fingerprint(LLM_INTENT_MODE, selected_match_id, match_details)
+            cached_answer = None
+            if answer_cache is not None:
+                cached_answer = answer_cache.get(user_input, st.session_state.match_data_version, answer_fingerprint)
+
+            renderer = StreamRenderer(response_area)
+            if cached_answer is not None:
+                for start in range(0, len(cached_answer), 40):
+                    renderer.append(cached_answer[start:start + 40])
+                # Keep the chat history as if the model had answered
+                llm_model.record_exchange(st.session_state.chat, full_prompt_to_gemini, cached_answer)
+                response = None
             else:
-                full_prompt_to_gemini = user_input # If no context, just send user query
-
-            st.write(f"DEBUG: Sending to LLM (first 200 chars): {full_prompt_to_gemini[:200]}...") # Debugging line
-
-            # Send message to Gemini and get response
-            response = st.session_state.chat.send_message(full_prompt_to_gemini, stream=True)
-            
-            # Iterate through the streamed response chunks
-            full_bot_reply = ""
-            for chunk in response:
-                if chunk.text:
-                    full_bot_reply += chunk.text
-                    response_area.markdown(full_bot_reply + "▌") # Add a blinking cursor effect
+                st.write(f"DEBUG: Sending to LLM (first 200 chars): {full_prompt_to_gemini[:200]}...") # Debugging line
+
+                # Send message to Gemini and get response
+                response = llm_model.get_response(st.session_state.chat, full_prompt_to_gemini, stream=True)
+
+            # single_call mode: the model asks for a match with get_match_details
+            def answer_call(function_call):
+                registry = st.session_state.match_registry
+                called_match = registry.resolve(dict(function_call.args)) if registry else None
+                if called_match is None:
+                    return "No current match matches that reference. Ask the user to fetch the latest matches or pick one from the list."
+                result = fetch_match_details(called_match.id, called_match.name) or "No details are available for this match yet."
+                return context_tracker.details_context(called_match.id, result)
+
+            def send_result(name, result, allow_tools):
+                return llm_model.send_function_result(st.session_state.chat, name, result, allow_tools=allow_tools)
+
+            # Stream the reply; re-renders are throttled to every STREAM_FLUSH_INTERVAL
+            # seconds (with a blinking cursor effect)
+            tool_calls = stream_reply(response, renderer.append, answer_call, send_result)
+            for future in prefetch_futures:
+                future.cancel()
             
             # Remove blinking cursor after full response
-            response_area.markdown(full_bot_reply)
+            full_bot_reply = renderer.finish()
             bot_reply = full_bot_reply
+            # Answers that needed a function call depend on details not in the fingerprint
+            if answer_cache is not None and cached_answer is None and not tool_calls and full_bot_reply:
+                answer_cache.set(user_input, st.session_state.match_data_version, answer_fingerprint, full_bot_reply)
+            # The turn is now part of the chat history, so its context counts as sent
+            context_tracker.commit()
 
         except Exception as e:
             bot_reply = f"Error communicating with Gemini or fetching match details: {e}"
@@ -0,0 +1,118 @@
+"""
+The process-wide snapshot of current matches that every session reads, and the
+diff between two currentMatches lists it is built around.
+"""
+import threading
+import time
+
+from config import CACHE_TTL_CURRENT_MATCHES
+from matching import LocalMatchResolver, MatchRegistry
+from models import parse_matches
+
+
+def diff_matches(old_matches, new_matches):
+    """
+    Compares two currentMatches lists by match id. Returns
+    {'added': [...], 'removed': [...], 'status_changed': [...]} with the match dicts
+    (new versions for added/status_changed, old versions for removed).
+    """
+    old_by_id = {m.get('id'): m for m in old_matches or []}
+    new_by_id = {m.get('id'): m for m in new_matches or []}
+    return {
+        "added": [m for match_id, m in new_by_id.items() if match_id not in old_by_id],
+        "removed": [m for match_id, m in old_by_id.items() if match_id not in new_by_id],
+        "status_changed": [
+            m for match_id, m in new_by_id.items()
+            if match_id in old_by_id and (
+                old_by_id[match_id].get('status') != m.get('status')
+                or old_by_id[match_id].get('matchStarted') != m.get('matchStarted')
+                or old_by_id[match_id].get('matchEnded') != m.get('matchEnded')
+            )
+        ],
+    }
+
+
+def is_empty_diff(diff):
+    """True if a diff_matches result contains no changes."""
+    return not (diff['added'] or diff['removed'] or diff['status_changed'])
+
+
+class MatchStore:
+    """
+    Process-wide, thread-safe holder of the latest currentMatches payload.
+    Every session keeps a reference to the same (read-only) snapshot instead of
+    fetching and storing its own copy, so N sessions cost one upstream fetch.
+    """
+    def __init__(self, max_age=CACHE_TTL_CURRENT_MATCHES):
+        self.max_age = max_age
+        # Replaced atomically as a whole so readers never see a half-updated snapshot
+        self.snapshot = None
+        self._fetch_lock = threading.Lock()
+
+    def is_fresh(self):
+        """True if a snapshot exists and is younger than max_age."""
+        snapshot = self.snapshot
+        return snapshot is not None and time.monotonic() - snapshot['fetched_at'] < self.max_age
+
+    def update(self, matches):
+        """
+        Publishes a new snapshot built from a currentMatches payload. If nothing changed
+        (the same match dicts in the same order; an unchanged page is even the same
+        objects, see CricketData._reuse_unchanged) the current snapshot is kept and only
+        its timestamp refreshed, so sessions have nothing to rebuild. Any other change,
+        a score or venue included, publishes a new version. The snapshot's 'diff' holds
+        the added, removed and status-changed matches relative to the previous version.
+        """
+        previous = self.snapshot
+        if previous and previous['matches'] == matches:
+            self.snapshot = dict(previous, fetched_at=time.monotonic())
+            return self.snapshot
+        diff = diff_matches(previous['matches'] if previous else [], matches)
+        models = parse_matches(matches)
+        registry = MatchRegistry(models)
+        self.snapshot = {
+            "matches": matches,
+            # Simplified list for LLM intent parsing, built once for all sessions
+            "match_list": [
+                {"index": i + 1, "name": m.get('name', 'N/A'), "id": m.get('id', 'N/A')}
+                for i, m in enumerate(matches)
+            ],
+            # Typed, slotted view of the same matches (see models.py)
+            "models": models,
+            # Constant-time lookup by id, number, name or team, built once per refresh
+            "registry": registry,
+            # Local number/team/similarity resolver that lets most turns skip the intent LLM
+            "resolver": LocalMatchResolver(registry),
+            "version": previous['version'] + 1 if previous else 1,
+            "diff": diff,
+            "fetched_at": time.monotonic(),
+        }
+        return self.snapshot
+
+    def get_snapshot(self, cricket_data, force=False, on_progress=None, priority=None):
+        """
+        Returns (snapshot, error). Only one thread fetches upstream at a time;
+        concurrent callers wait and reuse the snapshot it publishes.
+        on_progress(matches_so_far) is called after each page while loading; pages are
+        requested at the given quota priority (default: the client's own).
+        """
+        if not force and self.is_fresh():
+            return self.snapshot, None
+        with self._fetch_lock:
+            if not force and self.is_fresh():
+                return self.snapshot, None
+            errors = []
+            matches = []
+            for page in cricket_data.iter_current_match_pages(errors=errors, priority=priority):
+                matches.extend(page)
+                if on_progress:
+                    on_progress(matches)
+            error = errors[0] if errors else None
+            if error and self.snapshot is not None:
+                # A partial list would show as removed and renumbered matches in every
+                # session: keep serving the previous snapshot until a full refresh works
+                return self.snapshot, error
+            if not matches:
+                return None, error
+            # With nothing to fall back on, the pages we did get are still usable
+            return self.update(matches), error
@@ -0,0 +1,231 @@
+"""
+Match lookup helpers: an index over the current matches so a user's reference to a
+match (by number, name, or team) resolves in constant time.
+"""
+import re
+
+from models import Match
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+_VERSUS = re.compile(r"\s+(?:vs?\.?|versus)\s+")
+
+
+def normalise(text):
+    """Lowercases, unifies 'v'/'vs'/'versus', strips punctuation and collapses whitespace."""
+    text = _VERSUS.sub(" vs ", f" {text.lower()} ")
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def split_teams(name):
+    """Returns the normalised team names of 'A vs B[, 3rd ODI]', or () if it is not in that form."""
+    # The part after the first comma is the fixture ("3rd ODI", "Match 12", ...)
+    head = normalise(name.split(',')[0])
+    if " vs " not in head:
+        return ()
+    return tuple(team for team in (part.strip() for part in head.split(" vs ", 1)) if team)
+
+
+class MatchRegistry:
+    """
+    Indexes one refresh of current matches by id, 1-based display number,
+    normalised full name, team pair, and each team name or short code.
+    Built once per refresh and shared read-only by every session.
+    """
+    def __init__(self, matches):
+        self.matches = tuple(m if isinstance(m, Match) else Match.from_dict(m) for m in matches)
+        self.by_id = {}
+        self.number_by_id = {}
+        self.by_name = {}
+        self.by_pair = {}
+        self.by_team = {}
+        self.short_codes = set()  # by_team keys that are only short codes, not team names
+        for number, match in enumerate(self.matches, start=1):
+            self.by_id[match.id] = match
+            self.number_by_id.setdefault(match.id, number)
+            self.by_name.setdefault(normalise(match.name), match)
+            self.by_name.setdefault(normalise(match.name.split(',')[0]), match)
+            teams = {normalise(t) for t in match.teams} or set(split_teams(match.name))
+            if len(teams) == 2:
+                self.by_pair.setdefault(frozenset(teams), []).append(match)
+            codes = {normalise(code) for code in match.team_short_names}
+            self.short_codes |= codes - teams
+            for key in teams | codes:
+                self.by_team.setdefault(key, []).append(match)
+        # A code that is also some match's full team name is a name
+        self.short_codes -= {normalise(t) for m in self.matches for t in m.teams}
+
+    def __len__(self):
+        return len(self.matches)
+
+    def get_by_number(self, number):
+        """Returns the match shown as number (1-based), or None if out of range."""
+        if 1 <= number <= len(self.matches):
+            return self.matches[number - 1]
+        return None
+
+    def get_by_name(self, name):
+        """
+        Resolves a match name: exact normalised name first, then 'A vs B' in either
+        order, then a single team that plays in exactly one current match.
+        """
+        key = normalise(name)
+        match = self.by_name.get(key)
+        if match is not None:
+            return match
+        teams = split_teams(name)
+        if len(teams) == 2:
+            candidates = self.by_pair.get(frozenset(teams), ())
+            return candidates[0] if candidates else None
+        candidates = self.by_team.get(key, ())
+        return candidates[0] if len(candidates) == 1 else None
+
+    def number_of(self, match):
+        """Returns the 1-based display number of a match from this registry."""
+        return self.number_by_id.get(match.id)
+
+    def resolve(self, intent):
+        """Resolves an intent dict ({'match_number': n} or {'match_name': s}) to a Match, or None."""
+        if not intent:
+            return None
+        if "match_number" in intent:
+            try:
+                return self.get_by_number(int(intent["match_number"]))
+            except (TypeError, ValueError):
+                return None
+        if "match_name" in intent and intent["match_name"]:
+            return self.get_by_name(str(intent["match_name"]))
+        return None
+
+
+ORDINAL_WORDS = {
+    'first': 1, 'second': 2, 'third': 3, 'fourth': 4, 'fifth': 5,
+    'sixth': 6, 'seventh': 7, 'eighth': 8, 'ninth': 9, 'tenth': 10,
+}
+_ORDINAL_WORD = '|'.join(ORDINAL_WORDS)
+NUMBER_PATTERNS = (
+    re.compile(r'\bmatch\s*(?:no|number|num)?\s*(\d+)\b'),  # "match 2", "match no 2" ('#' is stripped)
+    re.compile(r'\b(\d+)(?:st|nd|rd|th)\s+match\b'),  # "2nd match", not "top 3 match winners"
+    re.compile(rf'\b({_ORDINAL_WORD})\s+(?:one|match|game)\b'),  # "second match"
+    re.compile(rf'\bmatch\s+({_ORDINAL_WORD})\b'),
+)
+
+
+def trigrams(text):
+    """Character trigrams of a normalised string, padded so short words still count."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LocalMatchResolver:
+    """
+    Resolves a free-text query to a match without calling the LLM. Tries, in order:
+    an explicit match number or ordinal, team names / short codes found in the
+    query, and trigram similarity against the match names. Each resolution comes
+    with a confidence in [0, 1]; callers fall back to the LLM when it is low.
+    """
+    def __init__(self, registry, min_similarity=0.6, min_margin=0.15):
+        self.registry = registry
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        # Longest keys first, so "india women" wins over "india"
+        self.team_keys = sorted(registry.by_team, key=len, reverse=True)
+        self.name_trigrams = {}
+        self.trigram_index = {}
+        for match in registry.matches:
+            grams = trigrams(normalise(match.name.split(',')[0]))
+            self.name_trigrams[match.id] = grams
+            for gram in grams:
+                self.trigram_index.setdefault(gram, set()).add(match.id)
+
+    def resolve(self, query):
+        """Returns (intent, confidence); intent is {'match_number': n} or {} if nothing matched."""
+        text = normalise(query)
+        for resolve in (self._by_number, lambda text: self._by_teams(text, query), self._by_similarity):
+            match, confidence = resolve(text)
+            if match is not None:
+                return {"match_number": self.registry.number_of(match)}, confidence
+        return {}, 0.0
+
+    def candidates(self, query, limit=2, min_score=0.3):
+        """
+        Up to limit matches the query most plausibly refers to, best first. Scoring is
+        loose (one point per team name or code found, plus the share of the match name's
+        trigrams in the query), so it suits guessing what to prefetch, not resolving.
+        """
+        text = normalise(query)
+        match, _ = self._by_number(text)
+        if match is not None:
+            return [match]
+        padded = f" {text} "
+        scores = {}
+        for key in self.team_keys:
+            if f" {key} " in padded:
+                for match in self.registry.by_team[key]:
+                    scores[match.id] = scores.get(match.id, 0.0) + 1.0
+        for gram in trigrams(text):
+            for match_id in self.trigram_index.get(gram, ()):
+                scores[match_id] = scores.get(match_id, 0.0) + 1.0 / len(self.name_trigrams[match_id])
+        ranked = sorted(((score, match_id) for match_id, score in scores.items() if score >= min_score), reverse=True)
+        return [self.registry.by_id[match_id] for _, match_id in ranked[:limit]]
+
+    def _by_number(self, text):
+        for pattern in NUMBER_PATTERNS:
+            found = pattern.search(text)
+            if found:
+                value = found.group(1)
+                number = ORDINAL_WORDS[value] if value in ORDINAL_WORDS else int(value)
+                match = self.registry.get_by_number(number)
+                if match is not None:
+                    return match, 0.95
+        return None, 0.0
+
+    def _by_teams(self, text, query=""):
+        padded = f" {text} "
+        found = []
+        for key in self.team_keys:
+            # Skip a key that is only part of a longer team found already ("pakistan" in
+            # "pakistan women"); whole tokens, so "sa" still counts next to "usa"
+            if f" {key} " in padded and not any(f" {key} " in f" {longer} " for longer in found):
+                found.append(key)
+        if len(found) >= 2:
+            # Works for full names and short codes alike ("aus vs ind")
+            first, second = (self.registry.by_team[key] for key in found[:2])
+            candidates = [m for m in first if m in second]
+            if len(candidates) == 1:
+                return candidates[0], 0.9
+        if len(found) == 1:
+            candidates = self.registry.by_team.get(found[0], ())
+            if len(candidates) == 1:
+                if found[0] in self.registry.short_codes and not self._is_team_code(found[0], padded, query):
+                    # Codes like CAN, SIX or PER are also English words: let the LLM confirm
+                    return candidates[0], 0.5
+                return candidates[0], 0.8
+        return None, 0.0
+
+    @staticmethod
+    def _is_team_code(code, padded, query):
+        """True if a short code found in the query is used as one: upper-case, or next to 'vs'."""
+        if re.search(rf'\b{re.escape(code.upper())}\b', query):
+            return True
+        return f" {code} vs " in padded or f" vs {code} " in padded
+
+    def _by_similarity(self, text):
+        query = trigrams(text)
+        overlap = {}
+        for gram in query:
+            for match_id in self.trigram_index.get(gram, ()):
+                overlap[match_id] = overlap.get(match_id, 0) + 1
+        if not overlap:
+            return None, 0.0
+        # Share of each match name's trigrams that appear in the query
+        scores = sorted(
+            ((count / len(self.name_trigrams[match_id]), match_id) for match_id, count in overlap.items()),
+            reverse=True,
+        )
+        best, match_id = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        if best >= self.min_similarity and best - runner_up >= self.min_margin:
+            return self.registry.by_id[match_id], best
+        return None, 0.0
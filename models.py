@@ -0,0 +1,110 @@
+"""
+Compact typed models for cricapi matches and squads.
+
+Slotted dataclasses avoid a per-object __dict__, and strings that repeat across
+thousands of players (roles, countries, styles, team names) are interned so every
+player shares one copy. Models are parsed once from the raw API dicts.
+"""
+import sys
+from dataclasses import dataclass, fields
+
+
+def _intern(value):
+    """Interns short repeated strings; passes None and non-strings through."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(frozen=True, slots=True)
+class Player:
+    id: str
+    name: str
+    role: str = None
+    batting_style: str = None
+    bowling_style: str = None
+    country: str = None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            id=data.get('id'),
+            name=data.get('name', 'N/A'),
+            role=_intern(data.get('role')),
+            batting_style=_intern(data.get('battingStyle')),
+            bowling_style=_intern(data.get('bowlingStyle')),
+            country=_intern(data.get('country')),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class TeamSquad:
+    name: str
+    short_name: str = None
+    players: tuple = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            name=_intern(data.get('teamName') or data.get('name', 'Unknown Team')),
+            short_name=_intern(data.get('shortname')),
+            players=tuple(Player.from_dict(p) for p in data.get('players') or ()),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Match:
+    id: str
+    name: str
+    status: str = None
+    match_type: str = None
+    venue: str = None
+    date: str = None
+    teams: tuple = ()
+    team_short_names: tuple = ()
+    match_started: bool = False
+    match_ended: bool = False
+
+    @classmethod
+    def from_dict(cls, data):
+        team_info = data.get('teamInfo') or ()
+        return cls(
+            id=data.get('id'),
+            name=data.get('name', 'N/A'),
+            status=data.get('status'),
+            match_type=_intern(data.get('matchType')),
+            venue=_intern(data.get('venue')),
+            date=data.get('date'),
+            teams=tuple(_intern(t) for t in data.get('teams') or ()),
+            team_short_names=tuple(_intern(t.get('shortname')) for t in team_info if t.get('shortname')),
+            match_started=bool(data.get('matchStarted')),
+            match_ended=bool(data.get('matchEnded')),
+        )
+
+    @property
+    def is_live(self):
+        return self.match_started and not self.match_ended
+
+
+def parse_matches(data):
+    """Parses a currentMatches data list into a tuple of Match."""
+    return tuple(Match.from_dict(m) for m in data or ())
+
+
+def parse_squad(data):
+    """Parses a match_squad data list into a tuple of TeamSquad."""
+    return tuple(TeamSquad.from_dict(t) for t in data or ())
+
+
+def deep_sizeof(obj, _seen=None):
+    """Approximate memory footprint of obj and everything it references (shared objects counted once)."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__slots__'):
+        size += sum(deep_sizeof(getattr(obj, f.name), seen) for f in fields(obj))
+    return size
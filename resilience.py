@@ -0,0 +1,125 @@
+"""
+Failure handling for cricket API calls: jittered exponential back-off, a circuit
+breaker that stops calling a failing upstream, and a daily quota budget that keeps
+the last calls of the day for live-match lookups.
+"""
+import random
+import threading
+import time
+
+from config import (
+    BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, BUDGET_LOW_PRIORITY_CUTOFF,
+    BUDGET_NORMAL_PRIORITY_CUTOFF, CRICKET_API_BACKOFF_BASE, CRICKET_API_BACKOFF_MAX,
+)
+
+
+def backoff_delay(attempt):
+    """Exponential back-off with full jitter for the given 0-based retry attempt."""
+    return random.uniform(0, min(CRICKET_API_BACKOFF_MAX, CRICKET_API_BACKOFF_BASE * 2 ** attempt))
+
+
+def is_retryable_status(status_code):
+    """Rate limiting and server errors are worth retrying; other 4xx are not."""
+    return status_code == 429 or status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Stops calling cricapi after failure_threshold consecutive failures. After
+    reset_timeout seconds one trial request is let through (half-open); its outcome
+    closes the breaker again or re-opens it for another reset_timeout. A trial that
+    never reports back is given up on after reset_timeout and another one is let through.
+    """
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a request may be sent now."""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self.opened_at = now  # when the trial started
+                return True
+            # Open, or half-open with the trial request still in flight
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+# Request priorities for the quota budgeter
+PRIORITY_LOW = 0     # non-essential refreshes, e.g. squads
+PRIORITY_NORMAL = 1  # regular lookups
+PRIORITY_HIGH = 2    # live-match lookups
+
+
+class RequestBudget:
+    """
+    Tracks cricapi's daily quota (info.hitsToday / info.hitsLimit from each response)
+    and decides which calls may still be spent. As usage approaches the limit, low
+    priority calls are refused first, then normal ones; the remainder is kept for
+    live-match lookups. Calls are counted locally as they go out, and corrected with
+    the API's own numbers whenever a response arrives.
+    """
+    def __init__(self, low_cutoff=BUDGET_LOW_PRIORITY_CUTOFF, normal_cutoff=BUDGET_NORMAL_PRIORITY_CUTOFF):
+        self.cutoffs = {PRIORITY_LOW: low_cutoff, PRIORITY_NORMAL: normal_cutoff, PRIORITY_HIGH: 1.0}
+        self.hits_today = 0
+        self.hits_limit = None  # unknown until the first response
+        self.denied = 0
+        self._day = time.strftime('%Y-%m-%d', time.gmtime())
+        self._lock = threading.Lock()
+
+    def _roll_day(self):
+        # cricapi quotas reset daily; start counting again on a new (UTC) day
+        today = time.strftime('%Y-%m-%d', time.gmtime())
+        if today != self._day:
+            self._day = today
+            self.hits_today = 0
+
+    def allows(self, priority=PRIORITY_NORMAL):
+        """True if the remaining budget still allows a call at this priority."""
+        with self._lock:
+            self._roll_day()
+            if self.hits_limit and self.hits_today >= self.hits_limit * self.cutoffs[priority]:
+                self.denied += 1
+                return False
+            return True
+
+    def spend(self):
+        """Counts one outgoing call until the API reports the real figure."""
+        with self._lock:
+            self.hits_today += 1
+
+    def record(self, info):
+        """Updates usage from a response's 'info' block."""
+        if not info:
+            return
+        with self._lock:
+            self._roll_day()
+            if info.get('hitsLimit'):
+                self.hits_limit = info['hitsLimit']
+            if info.get('hitsToday') is not None:
+                # Never count down: our local tally may be ahead of a cached/replayed figure
+                self.hits_today = max(self.hits_today, info['hitsToday'])
+
+    def stats(self):
+        """Returns current usage figures."""
+        with self._lock:
+            return {"hits_today": self.hits_today, "hits_limit": self.hits_limit, "denied": self.denied}
@@ -0,0 +1,103 @@
+import threading
+
+from caching import DiskResponseCache, ResponseCache, SingleFlight, get_cache_ttl
+from config import CACHE_TTL_MATCH_INFO_IDLE, CACHE_TTL_MATCH_INFO_LIVE, CACHE_TTL_MATCH_SQUAD
+
+
+def test_get_returns_fresh_entries_and_expires_them(clock):
+    cache = ResponseCache()
+    cache.set('k', {'a': 1}, ttl=10, size=5)
+    assert cache.get('k') == {'a': 1}
+    clock.advance(11)
+    assert cache.get('k') is None
+    # Expired data is still there as a fallback
+    assert cache.get_stale('k') == {'a': 1}
+    assert cache.get_stale_entry('k') == ({'a': 1}, 5)
+
+
+def test_lru_eviction_by_entry_count():
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', 1, 60, 1)
+    cache.set('b', 2, 60, 1)
+    cache.get('a')  # 'b' is now the least recently used
+    cache.set('c', 3, 60, 1)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_eviction_by_size_and_oversized_entries_are_skipped():
+    cache = ResponseCache(max_bytes=100)
+    cache.set('a', 1, 60, 60)
+    cache.set('b', 2, 60, 60)
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] == 60
+    cache.set('huge', 3, 60, 101)
+    assert cache.get('huge') is None
+
+
+def test_non_positive_ttl_is_not_stored():
+    cache = ResponseCache()
+    cache.set('k', 1, 0, 1)
+    assert cache.get('k') is None
+
+
+def test_disk_cache_is_a_second_level(tmp_path):
+    disk = DiskResponseCache(str(tmp_path / 'cache.db'))
+    ResponseCache(disk=disk).set(('match_info', 'x', 0), {'data': 1}, 60, 10)
+    # A new process (empty memory cache) finds it on disk
+    cache = ResponseCache(disk=disk)
+    assert cache.get(('match_info', 'x', 0)) == {'data': 1}
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_memory_only_entries_are_not_persisted(tmp_path):
+    disk = DiskResponseCache(str(tmp_path / 'cache.db'))
+    ResponseCache(disk=disk).set(('models',), {'m': 1}, 60, 10, persist=False)
+    assert ResponseCache(disk=disk).get(('models',)) is None
+
+
+def test_cache_ttl_depends_on_match_state():
+    assert get_cache_ttl('match_squad', None) == CACHE_TTL_MATCH_SQUAD
+    assert get_cache_ttl('match_info', {'matchStarted': True, 'matchEnded': False}) == CACHE_TTL_MATCH_INFO_LIVE
+    assert get_cache_ttl('match_info', {'matchStarted': True, 'matchEnded': True}) == CACHE_TTL_MATCH_SQUAD
+    assert get_cache_ttl('match_info', {'matchStarted': False}) == CACHE_TTL_MATCH_INFO_IDLE
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('k', slow)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flight.do('k', slow)))
+    follower.start()
+    while flight.shared == 0:
+        pass
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert results == ['result', 'result']
+    assert len(calls) == 1
+
+
+def test_single_flight_propagates_errors_and_forgets_the_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError('boom')
+
+    try:
+        flight.do('k', fail)
+    except RuntimeError:
+        pass
+    assert flight.do('k', lambda: 'ok') == 'ok'
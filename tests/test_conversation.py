@@ -0,0 +1,225 @@
+from types import SimpleNamespace
+
+from conversation import (
+    TOOL_LIMIT_RESULT, USER_QUERY_MARKER, AnswerCache, ChatContextTracker, ChatHistoryManager, IntentCache,
+    StreamRenderer, content_text, split_chunk, stream_reply,
+)
+
+
+def make_chat(turns, system="SYSTEM"):
+    history = [{'role': 'user', 'parts': [system]}]
+    for prompt, answer in turns:
+        history += [{'role': 'user', 'parts': [prompt]}, {'role': 'model', 'parts': [answer]}]
+    return SimpleNamespace(history=history)
+
+
+def test_history_under_budget_is_untouched():
+    chat = make_chat([('hi', 'hello')])
+    before = list(chat.history)
+    assert ChatHistoryManager(token_budget=1000).compact(chat, 'next') == 0
+    assert chat.history == before
+
+
+def test_history_over_budget_drops_oldest_turns_into_a_summary():
+    chat = make_chat([(f"question {i}", 'a' * 400) for i in range(10)])
+    manager = ChatHistoryManager(token_budget=400)
+    assert manager.compact(chat, 'next') > 0
+    texts = [content_text(c) for c in chat.history]
+    assert texts[0] == 'SYSTEM'  # pinned
+    assert texts[1].startswith(ChatHistoryManager.SUMMARY_PREFIX)
+    assert 'question 0' in texts[1]
+    assert texts[-2] == 'question 9'
+    assert manager.history_tokens(chat.history) <= 400
+    assert manager.stats()['compactions'] == 1
+
+
+def test_context_is_stripped_oldest_first_only_until_the_history_fits():
+    chat = make_chat([(f"{'x' * 400}\n{USER_QUERY_MARKER}question {i}", 'answer') for i in range(4)])
+    manager = ChatHistoryManager(token_budget=330)
+    assert manager.compact(chat, 'next') == 2
+    texts = [content_text(c) for c in chat.history]
+    assert texts[1] == 'question 0' and texts[3] == 'question 1'
+    assert texts[5].startswith('x') and texts[7].startswith('x')
+
+
+def test_history_stays_within_budget_at_steady_state():
+    """A long chat at the budget keeps fitting without resending the match list every turn."""
+    matches = [{'id': str(i), 'name': f'Team {i} vs Team {i + 1}', 'status': 'Live'} for i in range(10)]
+    manager = ChatHistoryManager(token_budget=600, summary_chars=200)
+    tracker = ChatContextTracker()
+    chat = make_chat([])
+
+    def build_prompt(i):
+        return f"{tracker.match_list_context(matches)}{USER_QUERY_MARKER}who should I pick {i}"
+
+    full_list_sends = 0
+    for i in range(40):
+        prompt = build_prompt(i)
+        while manager.compact(chat, prompt, tracker):
+            tracker.discard()
+            prompt = build_prompt(i)
+        assert manager.history_tokens(chat.history) + manager.estimate_tokens(prompt) <= 600
+        full_list_sends += ChatContextTracker.FULL_LIST_HEADER in prompt
+        chat.history += [{'role': 'user', 'parts': [prompt]}, {'role': 'model', 'parts': ['a' * 160]}]
+        tracker.commit()
+    assert full_list_sends <= 8
+
+
+def test_tracker_forgets_context_removed_from_the_history():
+    tracker = ChatContextTracker()
+    matches = [{'id': '1', 'name': 'M1', 'status': 'Live'}]
+    sent = tracker.match_list_context(matches) + tracker.details_context('m1', 'Squads:\n  - India: Kohli')
+    tracker.commit()
+    tracker.forget('an unrelated delta')
+    assert tracker.match_list_context(matches) == ''
+    assert 'provided earlier' in tracker.details_context('m1', 'Squads:\n  - India: Kohli')
+    tracker.forget(sent)
+    assert tracker.match_list_context(matches).startswith(ChatContextTracker.FULL_LIST_HEADER)
+    assert tracker.details_context('m1', 'Squads:\n  - India: Kohli') == 'Squads:\n  - India: Kohli'
+
+
+def test_tracker_sends_the_match_list_once_then_deltas():
+    tracker = ChatContextTracker()
+    matches = [{'id': str(i), 'name': f'M{i}', 'status': 'Not started'} for i in range(4)]
+    assert tracker.match_list_context(matches).startswith("General Current Match Data:")
+    tracker.commit()
+    assert tracker.match_list_context(matches) == ""
+    updated = [dict(matches[0], status='Live')] + matches[1:]
+    assert tracker.match_list_context(updated).startswith("Updates to the General Current Match Data")
+
+
+def test_tracker_replaces_repeated_details_with_a_reference():
+    tracker = ChatContextTracker()
+    assert tracker.details_context('m1', 'details') == 'details'
+    tracker.commit()
+    assert 'provided earlier' in tracker.details_context('m1', 'details')
+    assert tracker.details_context('m1', 'new details') == 'new details'
+
+
+def test_answer_cache_hits_near_identical_questions(clock):
+    cache = AnswerCache(ttl=60)
+    fingerprint = AnswerCache.fingerprint('two_call', 'm1', 'details')
+    cache.set("best captain for match 1", 1, fingerprint, "Kohli")
+    assert cache.get("who to pick as captain in match 1", 1, fingerprint) == "Kohli"
+    assert cache.get("best captain for match 2", 1, fingerprint) is None
+    assert cache.get("best vice captain for match 1", 1, fingerprint) is None
+    assert cache.get("best captain for match 1", 1, AnswerCache.fingerprint('two_call', 'm2', 'x')) is None
+    clock.advance(61)
+    assert cache.get("best captain for match 1", 1, fingerprint) is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 4
+
+
+def test_intent_cache_stats_count_hits_misses_and_local_resolutions():
+    cache = IntentCache()
+    key = IntentCache.make_key("Match 1!", "1. India vs Australia")
+    assert cache.get(key) is None
+    cache.set(key, {'match_number': 1})
+    assert cache.get(IntentCache.make_key("match 1", "1. India vs Australia")) == {'match_number': 1}
+    cache.record_local()
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'local': 1, 'entries': 1}
+
+
+def test_answer_cache_versions_do_not_clear_each_other():
+    cache = AnswerCache()
+    fingerprint = AnswerCache.fingerprint('two_call', 'm1', 'details')
+    cache.set("best captain for match 1", 2, fingerprint, "Kohli")
+    # A session still on an older version neither sees nor wipes the newer answer
+    assert cache.get("best captain for match 1", 0, fingerprint) is None
+    cache.set("best captain for match 1", 0, fingerprint, "Smith")
+    assert cache.get("best captain for match 1", 2, fingerprint) == "Kohli"
+    assert cache.get("best captain for match 1", 0, fingerprint) == "Smith"
+
+
+def test_only_turns_carrying_match_details_are_cacheable():
+    tracker = ChatContextTracker()
+    prompt = f"{tracker.details_context('m1', 'details')}{USER_QUERY_MARKER}best captain"
+    assert AnswerCache.is_cacheable('m1', 'details', prompt)
+    tracker.commit()
+    prompt = f"{tracker.details_context('m1', 'details')}{USER_QUERY_MARKER}best captain"
+    assert not AnswerCache.is_cacheable('m1', 'details', prompt)
+    assert not AnswerCache.is_cacheable(None, '', f"{USER_QUERY_MARKER}best captain")
+
+
+def test_answer_cache_evicts_least_recently_used():
+    cache = AnswerCache(max_entries=2)
+    fingerprint = AnswerCache.fingerprint('m1')
+    cache.set("captain india", 1, fingerprint, "a")
+    cache.set("keeper india", 1, fingerprint, "b")
+    cache.get("captain india", 1, fingerprint)
+    cache.set("bowler india", 1, fingerprint, "c")
+    assert cache.get("keeper india", 1, fingerprint) is None
+    assert cache.get("captain india", 1, fingerprint) == "a"
+
+
+def test_stream_renderer_throttles_and_finishes_without_cursor():
+    rendered = []
+    renderer = StreamRenderer(SimpleNamespace(markdown=rendered.append), flush_interval=3600)
+    for chunk in ("a", "b", "c"):
+        renderer.append(chunk)
+    assert rendered == []
+    assert renderer.finish() == "abc"
+    assert rendered == ["abc"]
+
+
+class FakePart:
+    """Like a proto Part: `"function_call" in part` is True only when the field is set."""
+    def __init__(self, text="", function_call=None):
+        self.text = text
+        self.function_call = function_call
+
+    def __contains__(self, field):
+        return getattr(self, field, None) is not None
+
+
+def make_chunk(*parts):
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=list(parts)))])
+
+
+def make_call(match_number):
+    return SimpleNamespace(name='get_match_details', args={'match_number': match_number})
+
+
+def test_split_chunk_separates_text_and_function_calls():
+    call = make_call(1)
+    assert split_chunk(make_chunk(FakePart('Hel'), FakePart('lo'))) == ('Hello', None)
+    assert split_chunk(make_chunk(FakePart(function_call=call), FakePart('!'))) == ('!', call)
+    assert split_chunk(SimpleNamespace(candidates=[])) == ('', None)
+
+
+def test_stream_reply_answers_function_calls():
+    sent = []
+    replies = iter([[make_chunk(FakePart('Kohli scored 82.'))]])
+
+    def send_result(name, result, allow_tools):
+        sent.append((name, result, allow_tools))
+        return next(replies)
+
+    texts = []
+    first = [make_chunk(FakePart('Checking. ')), make_chunk(FakePart(function_call=make_call(1)))]
+    tool_calls = stream_reply(first, texts.append, lambda call: f"details of {call.args['match_number']}",
+                              send_result, max_tool_calls=2)
+    assert tool_calls == 1
+    assert ''.join(texts) == 'Checking. Kohli scored 82.'
+    assert sent == [('get_match_details', 'details of 1', True)]
+
+
+def test_stream_reply_stops_tools_at_the_limit():
+    sent = []
+    # The model keeps calling, even after being told not to
+    replies = iter([[make_chunk(FakePart(function_call=make_call(2)))], [make_chunk(FakePart('Done.'))]])
+
+    def send_result(name, result, allow_tools):
+        sent.append((result, allow_tools))
+        return next(replies)
+
+    texts = []
+    first = [make_chunk(FakePart(function_call=make_call(1)))]
+    tool_calls = stream_reply(first, texts.append, lambda call: 'details', send_result, max_tool_calls=1)
+    assert tool_calls == 2
+    assert texts == ['Done.']
+    # The last allowed answer disables tools; a call past the limit still gets an answer
+    assert sent == [('details', False), (TOOL_LIMIT_RESULT, False)]
+
+
+def test_stream_reply_without_response():
+    assert stream_reply(None, None, None, None) == 0
@@ -0,0 +1,242 @@
+import asyncio
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+import cricket_api
+from caching import ResponseCache, SingleFlight
+from config import CRICKET_API_DEADLINE
+from cricket_api import AsyncClientPool, AsyncCricketData, CricketData, MatchPoller
+from resilience import PRIORITY_LOW, CircuitBreaker, RequestBudget
+
+
+def make_client():
+    """A CricketData with private caches, the breaker and budget it shares included."""
+    client = CricketData('key')
+    client.cache = ResponseCache()
+    client.single_flight = SingleFlight()
+    client.breaker = CircuitBreaker()
+    client.budget = RequestBudget()
+    client.validators = {}
+    return client
+
+
+@pytest.fixture
+def client():
+    """A CricketData with private caches and no network access."""
+    client = make_client()
+    client.requests = []
+
+    def fake_request(url_type, id=None, offset=0, priority=None):
+        client.requests.append((url_type, id, offset))
+        return {'status': 'success', 'data': {'id': id}}, None
+
+    client._request = fake_request
+    return client
+
+
+def test_fetch_payload_rechecks_the_cache_inside_single_flight(client):
+    payload = {'status': 'success', 'data': {'id': 'm1'}}
+    lookups = []
+    real_get = client.cache.get
+
+    def racing_get(key):
+        lookups.append(key)
+        if len(lookups) == 1:
+            # The leader stores its result right after our first miss
+            client.cache.set(key, payload, 60, 10)
+            return None
+        return real_get(key)
+
+    client.cache.get = racing_get
+    assert client._fetch_payload('match_info', 'm1') == (payload, None)
+    assert client.requests == []
+
+
+def test_async_client_pool_closes_each_loops_client_when_the_loop_ends():
+    pool = AsyncClientPool()
+    first = asyncio.run(pool.get_client())
+    second = asyncio.run(pool.get_client())
+    assert first is not second
+    assert first.is_closed and second.is_closed
+
+
+def test_async_client_has_no_inherited_sync_callers():
+    for name in ('iter_current_match_pages', 'iter_current_matches', 'prefetch_match_bundles'):
+        assert not hasattr(AsyncCricketData, name)
+
+
+def test_async_match_bundle_shares_the_retry_policy():
+    client = AsyncCricketData('key')
+    client.cache = ResponseCache()
+    client.breaker = CircuitBreaker()
+    client.budget = RequestBudget()
+    attempts = []
+
+    async def fake_attempt(url_type, id, offset, deadline):
+        attempts.append(url_type)
+        if url_type == 'match_info' and attempts.count(url_type) == 1:
+            return None, 0, 'timed out', True
+        data = [] if url_type == 'match_squad' else {'id': id}
+        return {'status': 'success', 'data': data}, 10, None, False
+
+    client._attempt = fake_attempt
+    client._retry_delay = lambda attempt, deadline: 0 if attempt < 1 else None
+    bundle = asyncio.run(client.get_match_bundle('m1'))
+    assert bundle == {'info': {'id': 'm1'}, 'squad': (), 'errors': {}}
+    assert attempts.count('match_info') == 2
+
+
+def test_attempt_timeouts_never_outlast_the_deadline(clock):
+    client = make_client()
+    assert client._attempt_timeout(clock.now + 60) == client.timeout
+    assert client._attempt_timeout(clock.now + 2) == (2, 2)
+
+
+def test_body_reading_stops_at_the_deadline(clock):
+    import requests
+
+    def drip(amt, decode_content):
+        clock.advance(1)
+        return b'x'
+
+    started = clock.now
+    with pytest.raises(requests.exceptions.Timeout):
+        CricketData._read_body(SimpleNamespace(raw=SimpleNamespace(read1=drip)), started + 5)
+    assert clock.now == started + 6
+
+
+def test_non_object_bodies_are_malformed():
+    payload, error, retryable = make_client()._check_payload('match_info', b'[1, 2]')
+    assert payload is None and 'unexpected list' in error and retryable
+
+
+def test_unexpected_errors_count_as_breaker_failures():
+    client = make_client()
+    client.breaker = CircuitBreaker(failure_threshold=1)
+
+    def broken_attempt(url_type, id, offset, deadline):
+        raise KeyError('boom')
+
+    client._attempt = broken_attempt
+    with pytest.raises(KeyError):
+        client._request('match_info', 'm1')
+    assert client.breaker.state == 'open'
+
+
+def test_unchanged_pages_keep_the_cached_entry_size():
+    client = make_client()
+    key = ('currentMatches', None, 0)
+    client.cache.set(key, {'status': 'success', 'data': []}, 60, 5000)
+    client.validators[key] = ('"etag"', 'hash')
+    not_modified = SimpleNamespace(status_code=304)
+    assert client._reuse_unchanged(key, not_modified, b'', client.validators[key]) == (
+        {'status': 'success', 'data': []}, 5000)
+
+
+def test_poller_refreshes_live_matches_until_its_next_pass():
+    live = {'id': 'm1', 'matchStarted': True, 'matchEnded': False}
+    forced = []
+
+    def get_snapshot(cricket_data, force=False, priority=None):
+        forced.append((force, priority))
+        return {'matches': [live, {'id': 'm2'}]}, None
+
+    refreshed = []
+    cricket_data = SimpleNamespace(
+        refresh=lambda url_type, id, ttl, priority: refreshed.append((url_type, id, ttl, priority)) or ({}, None))
+    MatchPoller(cricket_data, SimpleNamespace(get_snapshot=get_snapshot), interval=900).poll_once()
+    assert forced == [(True, PRIORITY_LOW)]
+    assert refreshed == [('match_info', 'm1', 900 + CRICKET_API_DEADLINE, PRIORITY_LOW)]
+
+
+def test_refresh_bypasses_the_cache_and_keeps_the_result_for_ttl(clock):
+    client = make_client()
+    client.cache.set(('match_info', 'm1', 0), {'status': 'success', 'data': {'v': 1}}, 30, 10)
+    fresh = {'status': 'success', 'data': {'v': 2, 'matchStarted': True}}
+    client._attempt = lambda url_type, id, offset, deadline: (fresh, 10, None, False)
+    assert client.refresh('match_info', 'm1', ttl=900) == ({'v': 2, 'matchStarted': True}, None)
+    clock.advance(899)
+    assert client._fetch('match_info', 'm1') == ({'v': 2, 'matchStarted': True}, None)
+
+
+class LazyFuture(Future):
+    """A future whose call only runs when its result is asked for, so it can still be cancelled."""
+    def __init__(self, fn, args):
+        super().__init__()
+        self.fn, self.args = fn, args
+
+    def result(self, timeout=None):
+        if not self.done():
+            self.set_result(self.fn(*self.args))
+        return super().result(timeout)
+
+
+@pytest.fixture
+def paged_client(monkeypatch):
+    """A CricketData serving 10 rows of currentMatches in pages of 2, one error offset aside."""
+    client = make_client()
+    client.offsets = []
+    client.failing_offset = None
+    client.futures = []
+
+    def fake_fetch_payload(url_type, id=None, offset=0, priority=None):
+        client.offsets.append(offset)
+        if offset == client.failing_offset:
+            return None, f"offset {offset} failed"
+        data = [{'id': str(i)} for i in range(offset, min(offset + 2, 10))]
+        return {'status': 'success', 'data': data, 'info': {'totalRows': 10}}, None
+
+    def submit(fn, *args):
+        client.futures.append(LazyFuture(fn, args))
+        return client.futures[-1]
+
+    client._fetch_payload = fake_fetch_payload
+    monkeypatch.setattr(cricket_api, 'get_executor', lambda: SimpleNamespace(submit=submit))
+    return client
+
+
+def test_pages_step_through_offsets_up_to_total_rows(paged_client):
+    pages = list(paged_client.iter_current_match_pages(max_pages=0, concurrency=2))
+    assert [[m['id'] for m in page] for page in pages] == [['0', '1'], ['2', '3'], ['4', '5'], ['6', '7'], ['8', '9']]
+    assert paged_client.offsets == [0, 2, 4, 6, 8]
+
+
+def test_pages_are_requested_at_the_given_priority(paged_client):
+    priorities = []
+    fetch = paged_client._fetch_payload
+
+    def recording_fetch(url_type, id=None, offset=0, priority=None):
+        priorities.append(priority)
+        return fetch(url_type, id, offset, priority)
+
+    paged_client._fetch_payload = recording_fetch
+    list(paged_client.iter_current_match_pages(max_pages=2, priority=PRIORITY_LOW))
+    assert priorities == [PRIORITY_LOW, PRIORITY_LOW]
+
+
+def test_pages_stop_at_max_pages(paged_client):
+    pages = list(paged_client.iter_current_match_pages(max_pages=3, concurrency=2))
+    assert len(pages) == 3
+    assert paged_client.offsets == [0, 2, 4]
+
+
+def test_page_error_stops_and_cancels_queued_pages(paged_client):
+    paged_client.failing_offset = 2
+    errors = []
+    pages = list(paged_client.iter_current_match_pages(max_pages=0, concurrency=2, errors=errors))
+    assert len(pages) == 1 and errors == ['offset 2 failed']
+    # Offset 4 was queued behind the failed page and offset 6 after it: neither was fetched
+    assert paged_client.offsets == [0, 2]
+    assert all(future.cancelled() for future in paged_client.futures[1:])
+
+
+def test_breaking_out_early_cancels_queued_pages(paged_client):
+    for i, page in enumerate(paged_client.iter_current_match_pages(max_pages=0, concurrency=3)):
+        if i == 1:
+            break
+    # Offsets 4 and 6 were queued with 2, and 8 when 2 was taken
+    assert paged_client.offsets == [0, 2]
+    assert all(future.cancelled() for future in paged_client.futures[1:])
+    assert len(paged_client.futures) == 4
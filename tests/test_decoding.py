@@ -0,0 +1,25 @@
+import pytest
+
+from decoding import BACKENDS, decode, decode_payload, stream_decode
+
+PAYLOAD = b'{"status": "success", "data": {"id": "m1", "score": [1.5, 2], "scorecard": [{"inning": {"r": 1}}]}}'
+
+
+def test_every_backend_decodes_bytes():
+    for backend in BACKENDS:
+        assert decode(PAYLOAD, backend)['data']['id'] == 'm1'
+
+
+def test_stream_decode_skips_the_scorecard():
+    pytest.importorskip('ijson')
+    payload = stream_decode(PAYLOAD)
+    assert payload == {'status': 'success', 'data': {'id': 'm1', 'score': [1.5, 2]}}
+    assert decode_payload(PAYLOAD, stream=True) == payload
+
+
+@pytest.mark.parametrize('content', [b'{"status": "succ', b'not json', b''])
+def test_malformed_input_raises_value_error(content):
+    with pytest.raises(ValueError):
+        stream_decode(content)
+    with pytest.raises(ValueError):
+        decode(content)
@@ -0,0 +1,66 @@
+from match_store import MatchStore, diff_matches, is_empty_diff
+
+
+def make_match(match_id, status='Not started'):
+    return {'id': match_id, 'name': f'Match {match_id}', 'status': status, 'teams': [f'A{match_id}', f'B{match_id}']}
+
+
+class FakeCricketData:
+    """Serves currentMatches pages; an Exception in pages stands for a page that failed."""
+    def __init__(self, pages):
+        self.pages = pages
+
+    def iter_current_match_pages(self, errors=None, priority=None):
+        for page in self.pages:
+            if isinstance(page, Exception):
+                errors.append(str(page))
+                return
+            yield page
+
+
+def test_diff_matches_reports_added_removed_and_status_changes():
+    diff = diff_matches([make_match('1'), make_match('2')], [make_match('2', 'Live'), make_match('3')])
+    assert [m['id'] for m in diff['added']] == ['3']
+    assert [m['id'] for m in diff['removed']] == ['1']
+    assert [m['id'] for m in diff['status_changed']] == ['2']
+    assert is_empty_diff(diff_matches([make_match('1')], [make_match('1')]))
+
+
+def test_get_snapshot_serves_a_fresh_snapshot_without_fetching(clock):
+    store = MatchStore(max_age=60)
+    first, error = store.get_snapshot(FakeCricketData([[make_match('1')]]))
+    assert error is None and first['version'] == 1
+    assert store.get_snapshot(FakeCricketData([RuntimeError('not called')])) == (first, None)
+
+
+def test_unchanged_refresh_keeps_the_snapshot(clock):
+    store = MatchStore(max_age=60)
+    first, _ = store.get_snapshot(FakeCricketData([[make_match('1'), make_match('2')]]))
+    clock.advance(61)
+    second, _ = store.get_snapshot(FakeCricketData([[make_match('1'), make_match('2')]]))
+    assert second['version'] == 1 and second['registry'] is first['registry']
+
+
+def test_changes_outside_the_diffed_fields_publish_a_new_version(clock):
+    store = MatchStore(max_age=60)
+    store.get_snapshot(FakeCricketData([[make_match('1', 'Live')]]))
+    clock.advance(61)
+    scored = dict(make_match('1', 'Live'), score=[{'r': 120, 'w': 3}])
+    snapshot, _ = store.get_snapshot(FakeCricketData([[scored]]))
+    assert snapshot['version'] == 2 and snapshot['matches'][0]['score'] == [{'r': 120, 'w': 3}]
+    assert is_empty_diff(snapshot['diff'])
+
+
+def test_partial_refresh_keeps_the_previous_snapshot(clock):
+    store = MatchStore(max_age=60)
+    first, _ = store.get_snapshot(FakeCricketData([[make_match('1')], [make_match('2')]]))
+    clock.advance(61)
+    snapshot, error = store.get_snapshot(FakeCricketData([[make_match('1')], RuntimeError('page 2 failed')]))
+    assert snapshot is first and error == 'page 2 failed'
+    assert not store.is_fresh()
+
+
+def test_partial_first_load_is_still_published():
+    store = MatchStore()
+    snapshot, error = store.get_snapshot(FakeCricketData([[make_match('1')], RuntimeError('page 2 failed')]))
+    assert [m['id'] for m in snapshot['matches']] == ['1'] and error == 'page 2 failed'
@@ -0,0 +1,94 @@
+import pytest
+
+from config import LOCAL_RESOLVER_THRESHOLD
+from matching import LocalMatchResolver, MatchRegistry, normalise
+
+MATCHES = [
+    {'id': 'm1', 'name': 'India vs Australia, 3rd ODI', 'teams': ['India', 'Australia'],
+     'teamInfo': [{'shortname': 'IND'}, {'shortname': 'AUS'}]},
+    {'id': 'm2', 'name': 'England vs Pakistan, 1st Test', 'teams': ['England', 'Pakistan'],
+     'teamInfo': [{'shortname': 'ENG'}, {'shortname': 'PAK'}]},
+    {'id': 'm3', 'name': 'Isle of Man Women vs Spain Women, 2nd T20I', 'teams': ['Isle of Man Women', 'Spain Women']},
+    {'id': 'm4', 'name': 'United States of America vs South Africa, 5th T20I',
+     'teams': ['United States of America', 'South Africa'], 'teamInfo': [{'shortname': 'USA'}, {'shortname': 'SA'}]},
+    {'id': 'm5', 'name': 'Canada vs Nepal, 2nd ODI', 'teams': ['Canada', 'Nepal'],
+     'teamInfo': [{'shortname': 'CAN'}, {'shortname': 'NEP'}]},
+    {'id': 'm6', 'name': 'Sydney Sixers vs Perth Scorchers, 12th Match', 'teams': ['Sydney Sixers', 'Perth Scorchers'],
+     'teamInfo': [{'shortname': 'SIX'}, {'shortname': 'PER'}]},
+]
+
+
+@pytest.fixture
+def registry():
+    return MatchRegistry(MATCHES)
+
+
+@pytest.fixture
+def resolver(registry):
+    return LocalMatchResolver(registry)
+
+
+def test_normalise():
+    assert normalise("India v. Australia!") == "india vs australia"
+
+
+def test_registry_resolves_numbers_names_and_pairs(registry):
+    assert registry.resolve({'match_number': 2}).id == 'm2'
+    assert registry.resolve({'match_number': '3'}).id == 'm3'
+    assert registry.resolve({'match_number': 9}) is None
+    assert registry.resolve({'match_name': 'Australia vs India'}).id == 'm1'
+    assert registry.resolve({'match_name': 'Spain Women'}).id == 'm3'
+    assert registry.resolve({}) is None
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('tell me about match 2', 'm2'),
+    ('second match please', 'm2'),
+    ('the 3rd match', 'm3'),
+    ('ind vs aus dream team', 'm1'),
+    ('captain for the pakistan game', 'm2'),
+])
+def test_resolver_confident_matches(registry, resolver, query, expected):
+    intent, confidence = resolver.resolve(query)
+    assert registry.resolve(intent).id == expected
+    assert confidence >= 0.75
+
+
+@pytest.mark.parametrize('query', [
+    'hello there',
+    # Lower-case short codes that are also English words
+    'who can I pick as captain',
+    'who will hit the most six today',
+    'runs per over',
+])
+def test_resolver_finds_nothing_in_unrelated_queries(resolver, query):
+    _, confidence = resolver.resolve(query)
+    assert confidence < LOCAL_RESOLVER_THRESHOLD
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('who should captain CAN', 'm5'),
+    ('can vs nep dream team', 'm5'),
+    ('picks for six vs per', 'm6'),
+])
+def test_short_codes_count_when_used_as_codes(registry, resolver, query, expected):
+    intent, confidence = resolver.resolve(query)
+    assert registry.resolve(intent).id == expected
+    assert confidence >= LOCAL_RESOLVER_THRESHOLD
+
+
+def test_team_codes_inside_longer_codes_still_count(registry, resolver):
+    # "sa" is part of "usa" as a string, but not as a token
+    intent, confidence = resolver.resolve('usa vs sa dream team')
+    assert registry.resolve(intent).id == 'm4'
+    assert confidence == 0.9
+
+
+@pytest.mark.parametrize('query', ['top 3 match winners', 'best 2 match ups'])
+def test_bare_numbers_before_match_are_not_match_references(resolver, query):
+    assert 'match_number' not in resolver.resolve(query)[0]
+
+
+def test_candidates_rank_plausible_matches(resolver):
+    assert [m.id for m in resolver.candidates('englnd pakistn test')] == ['m2']
+    assert resolver.candidates('hello there') == []
@@ -0,0 +1,70 @@
+from resilience import (
+    PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, CircuitBreaker, RequestBudget, backoff_delay,
+    is_retryable_status,
+)
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    clock.advance(30)
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    # Only one trial request at a time
+    assert not breaker.allow()
+
+
+def test_breaker_trial_outcome_closes_or_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow()
+
+
+def test_breaker_gives_up_on_a_trial_that_never_reports_back(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    clock.advance(29)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+
+
+def test_budget_refuses_low_then_normal_priority_near_the_limit():
+    budget = RequestBudget(low_cutoff=0.5, normal_cutoff=0.9)
+    assert budget.allows(PRIORITY_LOW)  # limit unknown: everything goes
+    budget.record({'hitsToday': 50, 'hitsLimit': 100})
+    assert not budget.allows(PRIORITY_LOW)
+    assert budget.allows(PRIORITY_NORMAL)
+    budget.record({'hitsToday': 90})
+    assert not budget.allows(PRIORITY_NORMAL)
+    assert budget.allows(PRIORITY_HIGH)
+    assert budget.stats()['denied'] == 2
+
+
+def test_budget_counts_locally_and_never_counts_down():
+    budget = RequestBudget()
+    budget.record({'hitsToday': 10, 'hitsLimit': 100})
+    budget.spend()
+    budget.spend()
+    budget.record({'hitsToday': 10})  # e.g. a cached figure
+    assert budget.stats()['hits_today'] == 12
+
+
+def test_backoff_and_retryable_statuses():
+    assert all(0 <= backoff_delay(attempt) <= 4 for attempt in range(10))
+    assert is_retryable_status(429) and is_retryable_status(503)
+    assert not is_retryable_status(404)